@@ -1,8 +1,11 @@
 import random
-from collections import defaultdict
-from typing import Tuple, Union
+from typing import Dict, Hashable, List, Sequence, Tuple, Union
 
+import numpy as np
+
+from config import Config
 from data_classes import Action
+from eligibility_traces import SparseTraces, discounted_reverse_sum
 from visualize import Visualize
 
 
@@ -10,6 +13,9 @@ class Actor:
     """
     Table-based Actor using the epsilon-greedy strategy
 
+    The policy is a float32 matrix with one row per visited state and one
+    column per action id.
+
     ...
 
     Attributes
@@ -17,12 +23,22 @@ class Actor:
 
     Methods
     -------
+    from_config(config, action_count):
+        Constructs the actor with the actor parameters of the config.
+    get_policy():
+        Returns (states in row order, their policy rows, epsilon).
+    set_policy(states, policy, epsilon):
+        Replaces the policy and epsilon with a snapshot.
     choose_action(state, possible_actions):
         Epsilon-greedy action selection function.
     update(td_error):
         Updates the policy function, then eligibilities for each state-action
         pair in the episode based on the td_error from the critic.
         Also decays the epsilon based on the epsilon decay rate.
+    update_episode(states, actions, td_errors):
+        Applies the offline lambda-return updates of a whole episode at once.
+    apply_td_error(state, action, td_error):
+        Updates Pi(state, action) alone from a TD error, used for planning.
     reset_eligibilities():
         Sets all eligibilities to 0.0
     replace_eligibilities(state, action):
@@ -36,6 +52,8 @@ class Actor:
         trace_decay: float,
         epsilon: float,
         epsilon_decay: float,
+        trace_horizon: int,
+        action_count: int,
     ) -> None:
         self.__learning_rate = learning_rate  # alpha
         self.__discount_factor = discount_factor  # gamma
@@ -44,29 +62,72 @@ class Actor:
         self.__epsilon = epsilon
         self.__epsilon_decay = epsilon_decay
 
-        self.__policy = defaultdict(lambda: defaultdict(float))  # Pi(s, a)
-        self.__eligibilities = defaultdict(lambda: defaultdict(float))
+        self.__state_rows: Dict[Hashable, int] = {}
+        self.__policy = np.zeros((64, action_count), dtype=np.float32)  # Pi(s, a)
+
+        # Keyed by the flat policy index row * action_count + action id.
+        # Traces are dropped once below (gamma * lambda)^trace_horizon, i.e. roughly trace_horizon steps after replacement
+        self.__action_count = action_count
+        self.__trace_horizon = trace_horizon
+        self.__eligibilities = SparseTraces(
+            discount_factor * trace_decay,
+            (discount_factor * trace_decay) ** trace_horizon,
+            key_dtype=np.intp,
+        )
         self.__epsilon_history = []
         self.__td_error_history = []
 
+    @classmethod
+    def from_config(cls, config: Config, action_count: int) -> 'Actor':
+        """Constructs the actor with the actor parameters of the config."""
+        return cls(
+            config.actor_learning_rate,
+            config.actor_discount_factor,
+            config.actor_trace_decay,
+            config.actor_epsilon,
+            config.actor_epsilon_decay,
+            config.actor_trace_horizon,
+            action_count,
+        )
+
     def set_epsilon(self, epsilon: float) -> None:
         self.__epsilon = epsilon
 
-    def choose_action(self, state: Tuple[int], possible_actions: Tuple[Action]) -> Union[Action, None]:
+    def get_policy(self) -> Tuple[List[Hashable], np.ndarray, float]:
+        """Returns (states in row order, their policy rows, epsilon), e.g. to publish to rollout workers."""
+        return list(self.__state_rows), self.__policy[:len(self.__state_rows)], self.__epsilon
+
+    def set_policy(self, states: Sequence[Hashable], policy: np.ndarray, epsilon: float) -> None:
+        """Replaces the policy and epsilon with a snapshot, e.g. one published by the learner."""
+        self.__state_rows = {state: row for row, state in enumerate(states)}
+        self.__policy = np.zeros((max(64, len(states)), self.__action_count), dtype=np.float32)
+        self.__policy[:len(states)] = policy
+        self.__epsilon = epsilon
+
+    def __get_row(self, state: Hashable) -> int:
+        """Policy row of the state, adding a zero row the first time the state is seen"""
+        row = self.__state_rows.get(state)
+        if row is None:
+            row = len(self.__state_rows)
+            if row == len(self.__policy):
+                self.__policy = np.concatenate((self.__policy, np.zeros_like(self.__policy)))
+            self.__state_rows[state] = row
+        return row
+
+    def choose_action(self, state: Hashable, possible_actions: Tuple[Action]) -> Union[Action, None]:
         """Epsilon-greedy action selection function."""
 
         if not bool(possible_actions):
             return None
 
-        def choose_uniform(possible_actions: Tuple[Action]) -> Action:
+        if random.random() < self.__epsilon:
             return random.choice(possible_actions)
 
-        def choose_greedy(state: Tuple[int], possible_actions: Tuple[Action]) -> Action:
-            return max(possible_actions, key=lambda action: self.__policy[state][action])
-
-        if random.random() < self.__epsilon:
-            return choose_uniform(possible_actions)
-        return choose_greedy(state, possible_actions)
+        row = self.__state_rows.get(state)
+        if row is None:
+            return possible_actions[0]  # Every preference of an unvisited state is 0.0
+        preferences = self.__policy[row, [action.id for action in possible_actions]]
+        return possible_actions[int(preferences.argmax())]
 
     def update(self, td_error: float) -> None:
         """
@@ -80,18 +141,40 @@ class Actor:
 
         self.__epsilon *= self.__epsilon_decay
 
-        for state in self.__eligibilities:
-            for action, eligibility in self.__eligibilities[state].items():
-                self.__policy[state][action] += self.__learning_rate * td_error * eligibility
-                self.__eligibilities[state][action] *= self.__discount_factor * self.__trace_decay
+        self.__policy.ravel()[self.__eligibilities.keys()] += self.__learning_rate * td_error * self.__eligibilities.values()
+        self.__eligibilities.decay()
+
+    def update_episode(self, states: Sequence[Hashable], actions: Sequence[Action], td_errors: np.ndarray) -> None:
+        """
+        Applies the offline lambda-return updates of a whole episode at once,
+        the same updates as one update per step with traces kept for trace_horizon steps.
+        Also decays epsilon once per step.
+        """
+        # Used for plotting:
+        self.__td_error_history.extend(td_errors.tolist())
+        self.__epsilon_history.extend((self.__epsilon * self.__epsilon_decay ** np.arange(len(td_errors))).tolist())
+
+        self.__epsilon *= self.__epsilon_decay ** len(td_errors)
+
+        keys = np.fromiter(
+            (self.__get_row(state) * self.__action_count + action.id for state, action in zip(states, actions)),
+            dtype=np.intp,
+            count=len(td_errors),
+        )
+        returns = discounted_reverse_sum(td_errors, self.__discount_factor * self.__trace_decay, self.__trace_horizon)
+        np.add.at(self.__policy.ravel(), keys, self.__learning_rate * returns)
+
+    def apply_td_error(self, state: Hashable, action: Action, td_error: float) -> None:
+        """Updates Pi(state, action) alone from a TD error, used for planning."""
+        self.__policy[self.__get_row(state), action.id] += self.__learning_rate * td_error
 
     def reset_eligibilities(self) -> None:
         """Sets all eligibilities to 0.0"""
-        self.__eligibilities = defaultdict(lambda: defaultdict(float))
+        self.__eligibilities.reset()
 
-    def replace_eligibilities(self, state: Tuple[int], action: Union[Action, None]) -> None:
+    def replace_eligibilities(self, state: Hashable, action: Action) -> None:
         """Replaces trace e(state) with 1.0"""
-        self.__eligibilities[state][action] = 1.0
+        self.__eligibilities.replace(self.__get_row(state) * self.__action_count + action.id)
 
     def plot_training_data(self) -> None:
         Visualize.plot_epsilon(self.__epsilon_history)
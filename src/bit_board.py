@@ -0,0 +1,118 @@
+from typing import Dict, Set, Tuple, Union
+
+import numpy as np
+
+from board_geometry import BoardGeometry
+from data_classes import Action, Shape
+from visualize import Visualize
+
+
+class BitBoard:
+    """
+    Hexagonal board storing the pegs as an integer bitmask over the playable cells
+
+    Bit k of the mask is set when cell k of the board geometry holds a peg.
+    Every jump is precomputed as (from, over, to) masks, so move generation
+    and moves are plain bit operations.
+
+    ...
+
+    Methods
+    -------
+    make_move(action, visualize):
+        Performs the action if it is legal, drawing the board with the board's Visualize instance if visualize is set.
+    get_all_legal_actions():
+        Returns every legal action for the current board.
+    get_board():
+        Returns the board as a grid (0 = outside, 1 = peg, 2 = empty).
+    """
+
+    __jump_tables: Dict[Tuple[Shape, int], Tuple[Tuple[int, int, Action]]] = {}
+
+    def __init__(self, board_type: Shape, size: int, holes: Set[Tuple[int, int]], visualize: Union[Visualize, None] = None):
+        self.__board_type = board_type
+        self.__visualize = visualize
+        self.__size = size
+        self.__geometry = BoardGeometry.get(board_type, size)
+        self._edges: Set[Tuple[int, int]] = set(self.__geometry.edges)
+
+        self.__jumps = self.__get_jump_table(board_type, size)
+
+        self.__initial_pegs = (1 << len(self.__geometry.cells)) - 1
+        for hole in holes:
+            if hole in self.__geometry.cell_index:
+                self.__initial_pegs &= ~(1 << self.__geometry.cell_index[hole])
+        self.__pegs = self.__initial_pegs
+
+        self.__initial_hash = self.__geometry.hash_pegs(
+            index for index in range(len(self.__geometry.cells)) if self.__initial_pegs >> index & 1
+        )
+        self.__hash = self.__initial_hash
+
+    @classmethod
+    def __get_jump_table(cls, board_type: Shape, size: int) -> Tuple[Tuple[int, int, Action]]:
+        """Jump table as (from | over, to, action), indexed by action id and built once per board shape and size"""
+        key = (board_type, size)
+        if key not in cls.__jump_tables:
+            geometry = BoardGeometry.get(board_type, size)
+            cls.__jump_tables[key] = tuple(
+                ((1 << start) | (1 << over), 1 << landing, action)
+                for (start, over, landing, _), action in zip(geometry.jumps, geometry.actions)
+            )
+        return cls.__jump_tables[key]
+
+    def get_pegs(self) -> int:
+        return self.__pegs
+
+    def get_state_key(self) -> int:
+        """Zobrist hash of the board, updated incrementally by make_move"""
+        return self.__hash
+
+    def get_board(self) -> np.ndarray:
+        board = np.zeros((self.__size, self.__size), dtype=np.int8)
+        for index, cell in enumerate(self.__geometry.cells):
+            board[cell] = 1 if self.__pegs >> index & 1 else 2
+        return board
+
+    def get_cell_values(self) -> Tuple[int]:
+        """Playable cells in row-major order (1 = peg, 2 = empty)"""
+        pegs = self.__pegs
+        return tuple(1 if pegs >> index & 1 else 2 for index in range(len(self.__geometry.cells)))
+
+    def reset_game(self) -> None:
+        self.__pegs = self.__initial_pegs
+        self.__hash = self.__initial_hash
+
+    def __draw_board(self, action: Action) -> None:
+        assert self.__visualize is not None, 'The board was created without a Visualize instance'
+        self.__visualize.draw_board(self.__board_type, self.get_board(), action.positions)
+
+    def make_move(self, action: Action, visualize: bool) -> None:
+        from_over_mask, to_mask, _ = self.__jumps[action.id]
+        if self.__pegs & from_over_mask == from_over_mask and not self.__pegs & to_mask:
+            self.__pegs ^= from_over_mask | to_mask
+            self.__hash ^= self.__geometry.action_hashes[action.id]
+
+            if visualize:
+                self.__draw_board(action)
+
+    def pegs_remaining(self) -> int:
+        return bin(self.__pegs).count('1')
+
+    def game_over(self) -> bool:
+        pegs = self.__pegs
+        return not any(
+            pegs & from_over_mask == from_over_mask and not pegs & to_mask
+            for from_over_mask, to_mask, _ in self.__jumps
+        )
+
+    def get_all_legal_actions(self) -> Tuple[Action]:
+        pegs = self.__pegs
+        return tuple(
+            action
+            for from_over_mask, to_mask, action in self.__jumps
+            if pegs & from_over_mask == from_over_mask and not pegs & to_mask
+        )
+
+    def __str__(self):
+        return str(self.get_board())
@@ -0,0 +1,121 @@
+import random
+from typing import Dict, Iterable, Tuple
+
+from data_classes import Action, Shape
+
+EDGES = {
+    Shape.Diamond: (
+        (0, -1),
+        (1, -1),
+        (1, 0),
+        (0, 1),
+        (-1, 1),
+        (-1, 0),
+    ),
+    Shape.Triangle: (
+        (0, -1),
+        (-1, -1),
+        (1, 0),
+        (0, 1),
+        (-1, 0),
+        (1, 1),
+    ),
+}
+
+
+class BoardGeometry:
+    """
+    Static layout of a hexagonal board of a given shape and size
+
+    Built once per (board_type, size) and shared by every board of that kind.
+
+    ...
+
+    Attributes
+    ----------
+    cells : Tuple[Tuple[int, int]]
+        Playable cells in row-major order, i.e. the order of the state vector
+    cell_index : Dict[Tuple[int, int], int]
+        Maps a playable cell to its position in cells (and its bit in a peg mask)
+    jumps : Tuple[Tuple[int, int, int, Tuple[int, int]]]
+        Every jump that stays on the board as (start, over, landing, direction),
+        where start, over and landing are cell indices
+    actions : Tuple[Action]
+        Action catalogue: one interned Action per jump, where actions[k].id == k
+        and actions[k] corresponds to jumps[k]
+    actions_by_start : Tuple[Tuple[Action]]
+        Actions starting in each cell, indexed like cells
+    actions_by_cell : Tuple[Tuple[Action]]
+        Actions whose start, over or landing cell is the given cell, indexed like cells
+    zobrist_keys : Tuple[int]
+        Random 64-bit key per cell; a state's hash is the XOR of the keys of the cells holding a peg
+    action_hashes : Tuple[int]
+        XOR of the zobrist keys of the three cells changed by each action, indexed by action id
+
+    Methods
+    -------
+    get(board_type, size):
+        Returns the shared geometry for the given board.
+    hash_pegs(pegs):
+        Returns the zobrist hash of a board with pegs in the given cell indices.
+    """
+
+    __cache: Dict[Tuple[Shape, int], 'BoardGeometry'] = {}
+
+    def __init__(self, board_type: Shape, size: int):
+        self.board_type = board_type
+        self.size = size
+        self.edges = EDGES[board_type]
+        self.cells = tuple(
+            (i, j)
+            for i in range(size)
+            for j in range(size)
+            if board_type == Shape.Diamond or j <= i
+        )
+        self.cell_index = {cell: index for index, cell in enumerate(self.cells)}
+        self.jumps = self.__build_jumps()
+        self.actions = tuple(
+            Action(self.cells[start], direction, action_id)
+            for action_id, (start, _, _, direction) in enumerate(self.jumps)
+        )
+        self.actions_by_start = tuple(
+            tuple(action for action in self.actions if action.start_coordinates == cell)
+            for cell in self.cells
+        )
+        self.actions_by_cell = tuple(
+            tuple(action for action in self.actions if cell in action.positions)
+            for cell in self.cells
+        )
+
+        # Seeded by the board, so every process and every board of this kind agree on the keys
+        generator = random.Random(f'{board_type.name}-{size}')
+        self.zobrist_keys = tuple(generator.getrandbits(64) for _ in self.cells)
+        self.action_hashes = tuple(
+            self.zobrist_keys[start] ^ self.zobrist_keys[over] ^ self.zobrist_keys[landing]
+            for start, over, landing, _ in self.jumps
+        )
+
+    @classmethod
+    def get(cls, board_type: Shape, size: int) -> 'BoardGeometry':
+        """Returns the shared geometry for the given board."""
+        key = (board_type, size)
+        if key not in cls.__cache:
+            cls.__cache[key] = cls(board_type, size)
+        return cls.__cache[key]
+
+    def hash_pegs(self, pegs: Iterable[int]) -> int:
+        """Returns the zobrist hash of a board with pegs in the given cell indices."""
+        state_hash = 0
+        for cell in pegs:
+            state_hash ^= self.zobrist_keys[cell]
+        return state_hash
+
+    def __build_jumps(self) -> Tuple[Tuple[int, int, int, Tuple[int, int]]]:
+        jumps = []
+        for start in self.cells:
+            for direction in self.edges:
+                over = (start[0] + direction[0], start[1] + direction[1])
+                landing = (start[0] + direction[0] * 2, start[1] + direction[1] * 2)
+                if over in self.cell_index and landing in self.cell_index:
+                    jumps.append((self.cell_index[start], self.cell_index[over], self.cell_index[landing], direction))
+        return tuple(jumps)
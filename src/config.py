@@ -0,0 +1,107 @@
+import dataclasses
+import importlib
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Dict, FrozenSet, Tuple, Union
+
+from data_classes import Shape
+
+
+@dataclass(frozen=True)
+class Config:
+    """
+    Typed, immutable configuration of one learner
+
+    Every field corresponds to the upper-case parameter of the same name in the
+    parameter files, so a parameter file loads into a Config and several learners
+    with different configurations can run in one process.
+
+    ...
+
+    Methods
+    -------
+    from_module(module, overrides):
+        Reads the parameters of a parameter file module, then applies the overrides.
+    load(parameter_file, overrides):
+        Imports parameter_files.<parameter_file> and reads it into a Config.
+    replace(overrides):
+        Returns a copy with the overrides applied.
+    """
+
+    # General
+    episodes: int
+    visualize_games: bool
+    frame_delay: float
+    headless: bool
+
+    # Simulated World
+    board_type: Shape
+    size: int
+    holes: FrozenSet[Tuple[int, int]]
+    winning_reward: float
+    losing_reward: float
+    step_reward: float
+    use_bitboard: bool
+    legal_action_cache_policy: str
+    legal_action_cache_size: int
+    number_of_boards: int
+    zobrist_debug: bool
+    canonicalize_states: bool
+    use_state_graph: bool
+    learning_mode: str
+
+    # Planning
+    planning_steps: int
+    planning_priority_threshold: float
+
+    # Rollout workers
+    num_workers: int
+    policy_lag: int
+    ring_capacity: int
+
+    # Actor
+    actor_learning_rate: float
+    actor_discount_factor: float
+    actor_trace_decay: float
+    actor_trace_horizon: int
+    actor_epsilon: float
+    actor_epsilon_decay: float
+
+    # Critic
+    critic_learning_rate: float
+    critic_discount_factor: float
+    critic_trace_decay: float
+    use_table_critic: bool
+    input_dimension: int
+    critic_nn_backend: str
+    critic_nn_dimensions: Tuple[int, ...]
+    critic_replay_capacity: int
+    critic_replay_batch_size: int
+    critic_replay_interval: int
+    critic_replay_prioritized: bool
+
+    def __post_init__(self):
+        object.__setattr__(self, 'holes', frozenset(self.holes))
+        object.__setattr__(self, 'critic_nn_dimensions', tuple(self.critic_nn_dimensions))
+        assert self.learning_mode in ('online', 'episode'), f'Unknown learning mode: {self.learning_mode}'
+
+    @staticmethod
+    def __get_fields(overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """Maps parameter names, e.g. ACTOR_EPSILON_DECAY, to field names"""
+        return {name.lower(): value for name, value in overrides.items()}
+
+    @classmethod
+    def from_module(cls, module: ModuleType, overrides: Union[Dict[str, Any], None] = None) -> 'Config':
+        """Reads the parameters of a parameter file module, then applies the overrides, given by parameter name."""
+        fields = {field.name: getattr(module, field.name.upper()) for field in dataclasses.fields(cls)}
+        fields.update(cls.__get_fields(overrides or {}))
+        return cls(**fields)
+
+    @classmethod
+    def load(cls, parameter_file: str, overrides: Union[Dict[str, Any], None] = None) -> 'Config':
+        """Imports parameter_files.<parameter_file>, e.g. D2_table_critic_triangle_5, and reads it into a Config."""
+        return cls.from_module(importlib.import_module(f'parameter_files.{parameter_file}'), overrides)
+
+    def replace(self, overrides: Dict[str, Any]) -> 'Config':
+        """Returns a copy with the overrides applied, given by parameter name."""
+        return dataclasses.replace(self, **self.__get_fields(overrides))
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import Sequence, Tuple, Union
+
+import numpy as np
 
 
 class Critic(ABC):
@@ -19,14 +21,58 @@ class Critic(ABC):
         terminalStateFactor = 1 - int(reward != 0)  # Ensures terminal state is always 0
         return reward + self._discount_factor * self._get_value(successor_state) * terminalStateFactor - self._get_value(current_state)
 
+    def values(self, states: Sequence) -> np.ndarray:
+        """Value function V(s) of every state. Critics override this with one batched lookup or forward pass"""
+        return np.array([self._get_value(state) for state in states], dtype=np.float64)
+
+    def td_errors(
+        self,
+        rewards: np.ndarray,
+        next_states: Sequence,
+        states: Sequence,
+        dones: Union[np.ndarray, None] = None,
+    ) -> np.ndarray:
+        """
+        TD errors of a batch of transitions, with every V(s') and V(s) from one call to values.
+        dones marks transitions into a terminal state and defaults to rewards != 0, like td_error.
+        """
+        rewards = np.asarray(rewards, dtype=np.float64)
+        dones = rewards != 0 if dones is None else np.asarray(dones, dtype=bool)
+        if isinstance(next_states, np.ndarray) and isinstance(states, np.ndarray):
+            values = self.values(np.concatenate((next_states, states)))
+        else:
+            values = self.values(list(next_states) + list(states))
+        next_values, current_values = values[:len(rewards)], values[len(rewards):]
+        return rewards + self._discount_factor * next_values * ~dones - current_values
+
+    def requires_state_vector(self) -> bool:
+        """Whether states passed to the critic must be state vectors rather than state keys"""
+        return False
+
     @abstractmethod
     def _get_value(self, state: Tuple[int]) -> float:
         raise NotImplementedError
 
     @abstractmethod
-    def update(self, reward: float, successor_state: Tuple[int], current_state: Tuple[int]) -> None:
+    def update(self, reward: float, successor_state: Tuple[int], current_state: Tuple[int]) -> float:
+        """Updates the critic from one transition and returns the TD error it used"""
         raise NotImplementedError
 
+    def update_episode(self, rewards: np.ndarray, successor_states: Sequence, current_states: Sequence) -> np.ndarray:
+        """
+        Updates the critic from a whole episode and returns the TD error of every step.
+        By default the steps are applied one by one, as in online learning.
+        """
+        td_errors = np.zeros(len(rewards))
+        for step, (reward, successor_state, current_state) in enumerate(zip(rewards, successor_states, current_states)):
+            self.replace_eligibilities(current_state)
+            td_errors[step] = self.update(reward, successor_state, current_state)
+        return td_errors
+
+    def apply_td_error(self, state: Tuple[int], td_error: float) -> None:
+        """One-step update V(s) <- V(s) + alpha * td_error without eligibilities, used for planning"""
+        raise NotImplementedError(f'{type(self).__name__} does not support planning')
+
     @abstractmethod
     def reset_eligibilities(self) -> None:
         raise NotImplementedError
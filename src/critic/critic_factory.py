@@ -1,5 +1,6 @@
+from config import Config
+
 from .critic import Critic
-from .nn_critic import NNCritic
 from .table_critic import TableCritic
 
 
@@ -12,9 +13,15 @@ class CriticFactory:
         critic_discount_factor: float,
         critic_trace_decay: float,
         critic_nn_dimensions: tuple,
+        critic_nn_backend: str = 'tensorflow',
+        critic_replay_capacity: int = 0,
+        critic_replay_batch_size: int = 32,
+        critic_replay_interval: int = 1,
+        critic_replay_prioritized: bool = False,
+        verbose: bool = True,
     ) -> Critic:
         """
-        Constructs either a TableCritic or NNCritic based on use_table_critic.
+        Constructs either a TableCritic or an NN-based critic based on use_table_critic.
 
         Parameters
         ----------
@@ -28,6 +35,19 @@ class CriticFactory:
                 Trace decay for the Critic
             critic_nn_dimensions : tuple
                 Dimensions for the neural network (if used)
+            critic_nn_backend : str
+                'tensorflow' for NNCritic or 'numpy' for NumpyNNCritic (if used).
+                TensorFlow is only imported for the 'tensorflow' backend.
+            critic_replay_capacity : int
+                Replay buffer size of the NN-based critic; 0 trains online with eligibility traces instead
+            critic_replay_batch_size : int
+                Mini-batch size of replay training
+            critic_replay_interval : int
+                Number of critic updates between two replay mini-batches
+            critic_replay_prioritized : bool
+                Whether replay mini-batches are sampled by TD error
+            verbose : bool
+                Whether the TensorFlow critic prints its model summary
 
         Returns
         -------
@@ -40,11 +60,49 @@ class CriticFactory:
                 critic_discount_factor,
                 critic_trace_decay,
             )
+        elif critic_nn_backend == 'numpy':
+            from .numpy_nn_critic import NumpyNNCritic
+
+            print('Using NumPy NN-based critic.')
+            return NumpyNNCritic(
+                critic_learning_rate,
+                critic_discount_factor,
+                critic_trace_decay,
+                critic_nn_dimensions,
+                critic_replay_capacity,
+                critic_replay_batch_size,
+                critic_replay_interval,
+                critic_replay_prioritized,
+            )
         else:
+            from .nn_critic import NNCritic
+
             print('Using NN-based critic.')
             return NNCritic(
                 critic_learning_rate,
                 critic_discount_factor,
                 critic_trace_decay,
                 critic_nn_dimensions,
+                critic_replay_capacity,
+                critic_replay_batch_size,
+                critic_replay_interval,
+                critic_replay_prioritized,
+                verbose,
             )
+
+    @staticmethod
+    def from_config(config: Config) -> Critic:
+        """Constructs the critic with the critic parameters of the config, see get_critic. Headless runs print no model summary."""
+        return CriticFactory.get_critic(
+            config.use_table_critic,
+            config.critic_learning_rate,
+            config.critic_discount_factor,
+            config.critic_trace_decay,
+            config.critic_nn_dimensions,
+            config.critic_nn_backend,
+            config.critic_replay_capacity,
+            config.critic_replay_batch_size,
+            config.critic_replay_interval,
+            config.critic_replay_prioritized,
+            not config.headless,
+        )
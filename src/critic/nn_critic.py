@@ -1,11 +1,14 @@
-from typing import Tuple
+from typing import Sequence, Tuple
 
+import numpy as np
 import tensorflow as tf
 from keras import backend as K  # noqa
 from keras.layers import Dense, Input
 from keras.models import Sequential
 from keras.optimizers import SGD
 
+from replay_buffer import ReplayBuffer
+
 from .critic import Critic
 
 
@@ -13,6 +16,10 @@ class NNCritic(Critic):
     """
     Neural network based Critic
 
+    Trains online with TD(lambda) eligibility traces, or, with a replay
+    capacity, with a compiled TD(0) gradient step on a mini-batch sampled from
+    a replay buffer every replay_interval updates.
+
     ...
 
     Attributes
@@ -20,8 +27,10 @@ class NNCritic(Critic):
 
     Methods
     -------
+    values(states):
+        Value function V(s) of every state vector, in one forward pass.
     update(current_state, successor_state, reward):
-        Updates eligibilities, then the value function.
+        Updates eligibilities, then the value function. Returns the TD error.
     reset_eligibilities():
         Sets all eligibilities to 0.0
     replace_eligibilities(state, action):
@@ -33,7 +42,12 @@ class NNCritic(Critic):
         learning_rate: float,
         discount_factor: float,
         trace_decay: float,
-        nn_dimensions: tuple
+        nn_dimensions: tuple,
+        replay_capacity: int = 0,
+        replay_batch_size: int = 32,
+        replay_interval: int = 1,
+        replay_prioritized: bool = False,
+        verbose: bool = False,
     ):
         super().__init__(
             learning_rate,  # alpha
@@ -42,8 +56,26 @@ class NNCritic(Critic):
         )
         assert nn_dimensions is not None, 'nn_dimensions cannot be None when using NN-based critic'
         self.__nn_dimensions = nn_dimensions
+        self.__verbose = verbose  # Prints the model summary
         self.__values = self.__build_critic_network()  # V(s)
-        self.reset_eligibilities()
+
+        # One persistent trace buffer per trainable weight, updated and zeroed in place
+        self.__eligibilities = [
+            tf.Variable(tf.zeros_like(weights), trainable=False)
+            for weights in self.__values.trainable_weights
+        ]
+
+        # Preallocated inputs of the compiled update step: row 0 is s, row 1 is s'
+        self.__state_buffer = np.zeros((2, nn_dimensions[0]), dtype=np.float32)
+        self.__states = tf.Variable(self.__state_buffer, trainable=False)
+        self.__reward = tf.Variable(0.0, trainable=False)
+        self.__terminal_state_factor = tf.Variable(1.0, trainable=False)
+
+        # Mini-batch training from a replay buffer instead of eligibility traces, if replay_capacity > 0
+        self.__replay_buffer = ReplayBuffer(replay_capacity, nn_dimensions[0], replay_prioritized) if replay_capacity > 0 else None
+        self.__replay_batch_size = replay_batch_size
+        self.__replay_interval = replay_interval
+        self.__updates = 0
 
     def __build_critic_network(self) -> Sequential:
         """Builds a neural network model with the provided dimensions and learning rate"""
@@ -63,38 +95,97 @@ class NNCritic(Critic):
             optimizer=SGD(learning_rate=self._learning_rate),
             loss='mean_squared_error'
         )
-        model.summary()
+        if self.__verbose:
+            model.summary()
         return model
 
+    def requires_state_vector(self) -> bool:
+        """The network takes the state vector as input"""
+        return True
+
     def _get_value(self, state: Tuple[int]) -> float:
         """Value function V(s)"""
-        return float(self.__values(tf.convert_to_tensor([state])))  # type: ignore
-
-    def update(self, reward: float, successor_state: Tuple[int], current_state: Tuple[int]) -> None:
-        """Updates eligibilities, then the value function."""
-
-        with tf.GradientTape(persistent=True) as tape:
-            target = reward + self._discount_factor * self.__values(tf.convert_to_tensor([successor_state]))  # type: ignore
-            prediction = self.__values(tf.convert_to_tensor([current_state]))
-            loss = self.__values.compiled_loss(target, prediction)
-            td_error = target - prediction
+        return float(self.values([state])[0])
+
+    def values(self, states: Sequence[Tuple[int]]) -> np.ndarray:
+        """Value function V(s) of every state vector, in one forward pass."""
+        return self.__forward(tf.convert_to_tensor(np.asarray(states, dtype=np.float32))).numpy().astype(np.float64)
+
+    @tf.function(autograph=False, experimental_relax_shapes=True)
+    def __forward(self, states: tf.Tensor) -> tf.Tensor:
+        return self.__values(states)[:, 0]
+
+    def update(self, reward: float, successor_state: Tuple[int], current_state: Tuple[int]) -> float:
+        """Updates eligibilities, then the value function. Returns the TD error."""
+        self.__state_buffer[0] = current_state
+        self.__state_buffer[1] = successor_state
+        self.__states.assign(self.__state_buffer)
+        self.__reward.assign(reward)
+        self.__terminal_state_factor.assign(1 - int(reward != 0))  # Ensures terminal state is always 0
+        if self.__replay_buffer is None:
+            return float(self.__update_step())
+
+        td_error = float(self.__td_error_step())
+        self.__replay_buffer.add(current_state, reward, successor_state, td_error)
+        self.__updates += 1
+        if self.__updates % self.__replay_interval == 0 and len(self.__replay_buffer) >= self.__replay_batch_size:
+            indices, *batch = self.__replay_buffer.sample(self.__replay_batch_size)
+            td_errors = self.__replay_step(*batch)
+            self.__replay_buffer.update_priorities(indices, td_errors.numpy())
+        return td_error
+
+    @tf.function(autograph=False)
+    def __td_error_step(self) -> tf.Tensor:
+        """Evaluates V(s) and V(s') in one forward pass and returns the TD error."""
+        values = self.__values(self.__states)[:, 0]
+        return self.__reward + self._discount_factor * values[1] * self.__terminal_state_factor - values[0]
+
+    @tf.function(autograph=False)
+    def __replay_step(
+        self,
+        states: tf.Tensor,
+        rewards: tf.Tensor,
+        next_states: tf.Tensor,
+        terminal_state_factors: tf.Tensor,
+        sample_weights: tf.Tensor,
+    ) -> tf.Tensor:
+        """
+        One SGD step on the weighted mean squared TD(0) error of a mini-batch,
+        w <- w + alpha * mean(sample weight * td_error * grad V(s)). Returns the TD errors.
+        """
+        targets = rewards + self._discount_factor * self.__values(next_states)[:, 0] * terminal_state_factors
+        with tf.GradientTape() as tape:
+            td_errors = targets - self.__values(states)[:, 0]
+            loss = 0.5 * tf.reduce_mean(sample_weights * tf.square(td_errors))
 
         gradients = tape.gradient(loss, self.__values.trainable_weights)
-        gradients = self.__modify_gradients(gradients, td_error)
-        self.__values.optimizer.apply_gradients(zip(gradients, self.__values.trainable_weights))  # type: ignore
-
-    def __modify_gradients(self, gradients, td_error):
-        for gradient, eligibility in zip(gradients, self.__eligibilities):
-            gradient *= 1 / (2 * td_error)
-            eligibility = self._discount_factor * self._trace_decay * eligibility + gradient
-            gradient = td_error * eligibility
-        return gradients
+        for weights, gradient in zip(self.__values.trainable_weights, gradients):
+            weights.assign_sub(self._learning_rate * gradient)
+        return td_errors
+
+    @tf.function(autograph=False)
+    def __update_step(self) -> tf.Tensor:
+        """
+        Evaluates V(s) and V(s') in one forward pass, then applies the TD(lambda) update
+        e <- gamma * lambda * e + grad V(s) and w <- w + alpha * td_error * e. Returns the TD error.
+        """
+        with tf.GradientTape() as tape:
+            values = self.__values(self.__states)[:, 0]
+            prediction = values[0]
+
+        gradients = tape.gradient(prediction, self.__values.trainable_weights)
+        target = self.__reward + self._discount_factor * values[1] * self.__terminal_state_factor
+        td_error = target - prediction
+
+        for weights, eligibility, gradient in zip(self.__values.trainable_weights, self.__eligibilities, gradients):
+            eligibility.assign(self._discount_factor * self._trace_decay * eligibility + gradient)
+            weights.assign_add(self._learning_rate * td_error * eligibility)
+        return td_error
 
     def reset_eligibilities(self) -> None:
         """Sets all eligibilities to 0.0"""
-        self.__eligibilities = []
-        for weights in self.__values.trainable_weights:
-            self.__eligibilities.append(tf.zeros(weights.shape))
+        for eligibility in self.__eligibilities:
+            eligibility.assign(tf.zeros_like(eligibility))
 
     def replace_eligibilities(self, _) -> None:
         """Not used by NNCritic."""
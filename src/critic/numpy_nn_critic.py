@@ -0,0 +1,186 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from replay_buffer import ReplayBuffer
+
+from .critic import Critic
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+
+class NumpyNNCritic(Critic):
+    """
+    Neural network based Critic written in NumPy
+
+    Same architecture as NNCritic (swish hidden layers, linear output), with
+    hand-written forward and backward passes, one TD(lambda) eligibility trace
+    per parameter and in-place SGD on float32 arrays. Does not use TensorFlow.
+    With a replay capacity, trains like NNCritic with a TD(0) step on a
+    mini-batch from a replay buffer every replay_interval updates instead.
+
+    ...
+
+    Attributes
+    ----------
+
+    Methods
+    -------
+    values(states):
+        Value function V(s) of every state vector, in one forward pass.
+    update(current_state, successor_state, reward):
+        Updates eligibilities, then the value function. Returns the TD error.
+    reset_eligibilities():
+        Sets all eligibilities to 0.0
+    replace_eligibilities(state, action):
+        Not used by NumpyNNCritic.
+    """
+
+    def __init__(
+        self,
+        learning_rate: float,
+        discount_factor: float,
+        trace_decay: float,
+        nn_dimensions: tuple,
+        replay_capacity: int = 0,
+        replay_batch_size: int = 32,
+        replay_interval: int = 1,
+        replay_prioritized: bool = False,
+    ):
+        super().__init__(
+            learning_rate,  # alpha
+            discount_factor,  # gamma
+            trace_decay,  # lambda
+        )
+        assert nn_dimensions is not None, 'nn_dimensions cannot be None when using NN-based critic'
+        assert nn_dimensions[-1] == 1, 'Output dimension must be 1'
+
+        # Glorot uniform weights and zero biases, like the Keras Dense defaults
+        self.__weights: List[np.ndarray] = []
+        self.__biases: List[np.ndarray] = []
+        for fan_in, fan_out in zip(nn_dimensions[:-1], nn_dimensions[1:]):
+            limit = np.sqrt(6 / (fan_in + fan_out))
+            self.__weights.append(np.random.uniform(-limit, limit, (fan_in, fan_out)).astype(np.float32))
+            self.__biases.append(np.zeros(fan_out, dtype=np.float32))
+        self.__parameters = [parameter for layer in zip(self.__weights, self.__biases) for parameter in layer]
+
+        self.__eligibilities = [np.zeros_like(parameter) for parameter in self.__parameters]
+
+        # Preallocated inputs of the update step: row 0 is s, row 1 is s'
+        self.__state_buffer = np.zeros((2, nn_dimensions[0]), dtype=np.float32)
+        self.__current_state_gradient = np.array([1.0, 0.0], dtype=np.float32)
+
+        # Mini-batch training from a replay buffer instead of eligibility traces, if replay_capacity > 0
+        self.__replay_buffer = ReplayBuffer(replay_capacity, nn_dimensions[0], replay_prioritized) if replay_capacity > 0 else None
+        self.__replay_batch_size = replay_batch_size
+        self.__replay_interval = replay_interval
+        self.__updates = 0
+
+    def __forward(self, states: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray], List[np.ndarray]]:
+        """Returns V for each state, and the inputs and pre-activations of every layer"""
+        inputs, pre_activations = [], []
+        activations = states
+        output_layer = len(self.__weights) - 1
+        for layer, (weights, biases) in enumerate(zip(self.__weights, self.__biases)):
+            inputs.append(activations)
+            pre_activation = activations @ weights + biases
+            pre_activations.append(pre_activation)
+            activations = pre_activation if layer == output_layer else pre_activation * _sigmoid(pre_activation)
+        return activations[:, 0], inputs, pre_activations
+
+    def __backward(
+        self,
+        inputs: List[np.ndarray],
+        pre_activations: List[np.ndarray],
+        value_gradients: np.ndarray,
+    ) -> List[np.ndarray]:
+        """Returns the gradient of sum_i value_gradients[i] * V(states[i]) for every parameter"""
+        gradients: List[np.ndarray] = [None] * len(self.__parameters)  # type: ignore
+        upstream = value_gradients[:, np.newaxis].astype(np.float32)  # dV/d(output pre-activation)
+        output_layer = len(self.__weights) - 1
+        for layer in reversed(range(len(self.__weights))):
+            if layer != output_layer:
+                pre_activation = pre_activations[layer]
+                sigmoid = _sigmoid(pre_activation)
+                upstream = upstream * (sigmoid + pre_activation * sigmoid * (1 - sigmoid))  # swish'
+            gradients[2 * layer] = inputs[layer].T @ upstream
+            gradients[2 * layer + 1] = upstream.sum(axis=0)
+            upstream = upstream @ self.__weights[layer].T
+        return gradients
+
+    def requires_state_vector(self) -> bool:
+        """The network takes the state vector as input"""
+        return True
+
+    def _get_value(self, state: Tuple[int]) -> float:
+        """Value function V(s)"""
+        return float(self.values([state])[0])
+
+    def values(self, states: Sequence[Tuple[int]]) -> np.ndarray:
+        """Value function V(s) of every state vector, in one forward pass."""
+        values, _, _ = self.__forward(np.asarray(states, dtype=np.float32))
+        return values.astype(np.float64)
+
+    def update(self, reward: float, successor_state: Tuple[int], current_state: Tuple[int]) -> float:
+        """Updates eligibilities, then the value function. Returns the TD error."""
+        self.__state_buffer[0] = current_state
+        self.__state_buffer[1] = successor_state
+        values, inputs, pre_activations = self.__forward(self.__state_buffer)
+
+        terminal_state_factor = 1 - int(reward != 0)  # Ensures terminal state is always 0
+        td_error = float(reward + self._discount_factor * values[1] * terminal_state_factor - values[0])
+
+        if self.__replay_buffer is not None:
+            self.__replay_buffer.add(current_state, reward, successor_state, td_error)
+            self.__updates += 1
+            if self.__updates % self.__replay_interval == 0 and len(self.__replay_buffer) >= self.__replay_batch_size:
+                indices, *batch = self.__replay_buffer.sample(self.__replay_batch_size)
+                self.__replay_buffer.update_priorities(indices, self.__replay_step(*batch))
+            return td_error
+
+        gradients = self.__backward(inputs, pre_activations, self.__current_state_gradient)
+        step = self._learning_rate * td_error
+        for parameter, eligibility, gradient in zip(self.__parameters, self.__eligibilities, gradients):
+            eligibility *= self._discount_factor * self._trace_decay
+            eligibility += gradient
+            parameter += step * eligibility
+        return td_error
+
+    def __replay_step(
+        self,
+        states: np.ndarray,
+        rewards: np.ndarray,
+        next_states: np.ndarray,
+        terminal_state_factors: np.ndarray,
+        sample_weights: np.ndarray,
+    ) -> np.ndarray:
+        """
+        One SGD step on the weighted mean squared TD(0) error of a mini-batch,
+        w <- w + alpha * mean(sample weight * td_error * grad V(s)). Returns the TD errors.
+        """
+        batch_size = len(states)
+        values, inputs, pre_activations = self.__forward(np.concatenate((states, next_states)))
+        td_errors = rewards + self._discount_factor * values[batch_size:] * terminal_state_factors - values[:batch_size]
+
+        # Only V(s) is differentiated, the rows of s' get a zero gradient
+        value_gradients = np.zeros(2 * batch_size, dtype=np.float32)
+        value_gradients[:batch_size] = sample_weights * td_errors / batch_size
+        gradients = self.__backward(inputs, pre_activations, value_gradients)
+        for parameter, gradient in zip(self.__parameters, gradients):
+            parameter += self._learning_rate * gradient
+        return td_errors
+
+    def reset_eligibilities(self) -> None:
+        """Sets all eligibilities to 0.0"""
+        for eligibility in self.__eligibilities:
+            eligibility.fill(0.0)
+
+    def replace_eligibilities(self, _) -> None:
+        """Not used by NumpyNNCritic."""
+        pass
+
+    def plot_training_data(self):
+        """Not used by NumpyNNCritic."""
+        pass
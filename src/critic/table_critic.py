@@ -1,7 +1,9 @@
 import random
-from collections import defaultdict
-from typing import Tuple
+from typing import Dict, Hashable, Sequence
 
+import numpy as np
+
+from eligibility_traces import discounted_reverse_sum
 from visualize import Visualize
 
 from .critic import Critic
@@ -11,6 +13,9 @@ class TableCritic(Critic):
     """
     Table based Critic
 
+    Each state is mapped to a row index into float32 value and trace arrays,
+    which grow geometrically as new states are seen.
+
     ...
 
     Attributes
@@ -18,8 +23,14 @@ class TableCritic(Critic):
 
     Methods
     -------
+    values(states):
+        Value function V(s) of every state, gathered from the value array.
     update(current_state, successor_state, reward):
         Updates value function, then eligibilities for each state in the episode.
+    update_episode(rewards, successor_states, current_states):
+        Applies the offline lambda-return updates of a whole episode at once.
+    apply_td_error(state, td_error):
+        Updates V(state) alone from a TD error, used for planning.
     reset_eligibilities():
         Sets all eligibilities to 0.0
     replace_eligibilities(state, action):
@@ -31,40 +42,129 @@ class TableCritic(Critic):
         learning_rate: float,
         discount_factor: float,
         trace_decay: float,
+        capacity: int = 1024,
     ):
         super().__init__(
             learning_rate,  # alpha
             discount_factor,  # gamma
             trace_decay,  # lambda
         )
-        self.__values = defaultdict(lambda: (random.random() - 0.5) * 0.02)  # V(s)
-        self.__eligibilities = defaultdict(float)
+        self.__state_indices: Dict[Hashable, int] = {}
+        self.__values = np.zeros(capacity, dtype=np.float32)  # V(s)
+        self.__eligibilities = np.zeros(capacity, dtype=np.float32)
+        self.__is_active = np.zeros(capacity, dtype=bool)
+
+        # Rows with a trace in the current episode
+        self.__active = np.zeros(64, dtype=np.intp)
+        self.__active_count = 0
+
+        # Row with the largest |V(s)|, tracked incrementally for plotting
+        self.__max_index = -1
+        self.__max_magnitude = 0.0
         self.__value_history = []
 
-    def _get_value(self, state: Tuple[int]) -> float:
+    def __get_index(self, state: Hashable) -> int:
+        """Row of the state, initializing V(s) with a small random value the first time the state is seen"""
+        index = self.__state_indices.get(state)
+        if index is None:
+            index = len(self.__state_indices)
+            if index == len(self.__values):
+                self.__values = np.concatenate((self.__values, np.zeros_like(self.__values)))
+                self.__eligibilities = np.concatenate((self.__eligibilities, np.zeros_like(self.__eligibilities)))
+                self.__is_active = np.concatenate((self.__is_active, np.zeros_like(self.__is_active)))
+            self.__values[index] = (random.random() - 0.5) * 0.02
+            self.__state_indices[state] = index
+
+            if abs(self.__values[index]) > self.__max_magnitude or self.__max_index < 0:
+                self.__max_index = index
+                self.__max_magnitude = abs(float(self.__values[index]))
+        return index
+
+    def __get_indices(self, states: Sequence[Hashable]) -> np.ndarray:
+        return np.fromiter((self.__get_index(state) for state in states), dtype=np.intp, count=len(states))
+
+    def _get_value(self, state: Hashable) -> float:
         """Value function V(s)"""
-        return self.__values[state]
+        index = self.__get_index(state)
+        return float(self.__values[index])
 
-    def update(self, reward: float, successor_state: Tuple[int], current_state: Tuple[int]) -> None:
-        """Updates value function, then eligibilities for each state in the episode."""
+    def values(self, states: Sequence[Hashable]) -> np.ndarray:
+        """Value function V(s) of every state, gathered from the value array."""
+        indices = self.__get_indices(states)
+        return self.__values[indices].astype(np.float64)
+
+    def update(self, reward: float, successor_state: Hashable, current_state: Hashable) -> float:
+        """
+        Updates value function, then eligibilities for each state in the episode.
+        Returns the TD error.
+        """
 
         td_error = self.td_error(reward, successor_state, current_state)
 
-        for state, eligibility in self.__eligibilities.items():
-            self.__values[state] += self._learning_rate * td_error * eligibility
-            self.__eligibilities[state] *= self._discount_factor * self._trace_decay
+        active = self.__active[:self.__active_count]
+        self.__values[active] += self._learning_rate * td_error * self.__eligibilities[active]
+        self.__eligibilities[active] *= self._discount_factor * self._trace_decay
+
+        self.__track_max_value(active)
+        return td_error
+
+    def update_episode(self, rewards: np.ndarray, successor_states: Sequence, current_states: Sequence) -> np.ndarray:
+        """
+        Applies the offline lambda-return updates of a whole episode at once.
+        TD errors use the values from the start of the episode. Returns the TD error of every step.
+        """
+        td_errors = self.td_errors(rewards, successor_states, current_states)
+        indices = self.__get_indices(current_states)
+        returns = discounted_reverse_sum(td_errors, self._discount_factor * self._trace_decay)
+        np.add.at(self.__values, indices, self._learning_rate * returns)
+
+        self.__track_max_value(np.unique(indices))
+        return td_errors
+
+    def apply_td_error(self, state: Hashable, td_error: float) -> None:
+        """Updates V(state) alone from a TD error, used for planning."""
+        index = self.__get_index(state)
+        self.__values[index] += self._learning_rate * td_error
+        self.__track_max_value(np.array([index]))
+
+    def __track_max_value(self, updated: np.ndarray) -> None:
+        """Keeps the row with the largest |V(s)| up to date after the rows in updated changed"""
+        if len(updated) == 0:
+            return
+
+        magnitudes = np.abs(self.__values[updated])
+        best = int(updated[magnitudes.argmax()])
+        max_magnitude = abs(float(self.__values[self.__max_index]))
+
+        if (updated == self.__max_index).any() and max_magnitude < self.__max_magnitude:
+            # The previous maximum shrank, so another row may now hold the maximum
+            self.__max_index = int(np.abs(self.__values[:len(self.__state_indices)]).argmax())
+        elif magnitudes.max() > max_magnitude:
+            self.__max_index = best
+        self.__max_magnitude = abs(float(self.__values[self.__max_index]))
 
     def reset_eligibilities(self) -> None:
         """Sets all eligibilities to 0.0"""
-        self.__eligibilities = defaultdict(float)
+        active = self.__active[:self.__active_count]
+        self.__eligibilities[active] = 0.0
+        self.__is_active[active] = False
+        self.__active_count = 0
 
         # Used for plotting:
-        if len(self.__values) != 0:
-            self.__value_history.append(self.__values[max(self.__values, key=lambda state: abs(self._get_value(state)))])
+        if self.__max_index >= 0:
+            self.__value_history.append(float(self.__values[self.__max_index]))
 
-    def replace_eligibilities(self, state: Tuple[int]) -> None:
+    def replace_eligibilities(self, state: Hashable) -> None:
         """Replaces trace e(state) with 1.0"""
-        self.__eligibilities[state] = 1
+        index = self.__get_index(state)
+        self.__eligibilities[index] = 1.0
+
+        if not self.__is_active[index]:
+            if self.__active_count == len(self.__active):
+                self.__active = np.concatenate((self.__active, np.zeros_like(self.__active)))
+            self.__active[self.__active_count] = index
+            self.__active_count += 1
+            self.__is_active[index] = True
 
     def plot_training_data(self) -> None:
         Visualize.plot_value_history(self.__value_history)
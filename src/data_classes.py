@@ -3,28 +3,39 @@ from typing import Tuple
 
 
 class Action:
-
-    def __init__(self, start_coordinates: Tuple[int, int], direction_vector: Tuple[int, int]):
+    """
+    A jump from start_coordinates over one neighbour in direction_vector
+
+    Actions are interned: BoardGeometry builds one instance per possible jump
+    with a dense integer id, and boards hand out these shared instances.
+    """
+
+    __slots__ = (
+        'id',
+        'start_coordinates',
+        'direction_vector',
+        'adjacent_coordinates',
+        'landing_coordinates',
+        'positions',
+        '_hash',
+    )
+
+    def __init__(self, start_coordinates: Tuple[int, int], direction_vector: Tuple[int, int], action_id: int = -1):
+        self.id = action_id
         self.start_coordinates = start_coordinates
         self.direction_vector = direction_vector
-
-    @property
-    def adjacent_coordinates(self) -> Tuple[int, int]:
-        return (self.start_coordinates[0] + self.direction_vector[0]), (self.start_coordinates[1] + self.direction_vector[1])
-
-    @property
-    def landing_coordinates(self) -> Tuple[int, int]:
-        return (self.start_coordinates[0] + (self.direction_vector[0] * 2)), (self.start_coordinates[1] + (self.direction_vector[1] * 2))
-
-    @property
-    def positions(self) -> Tuple[Tuple[int, int], Tuple[int, int], Tuple[int, int]]:
-        return self.start_coordinates, self.adjacent_coordinates, self.landing_coordinates
+        self.adjacent_coordinates = (start_coordinates[0] + direction_vector[0]), (start_coordinates[1] + direction_vector[1])
+        self.landing_coordinates = (start_coordinates[0] + (direction_vector[0] * 2)), (start_coordinates[1] + (direction_vector[1] * 2))
+        self.positions = self.start_coordinates, self.adjacent_coordinates, self.landing_coordinates
+        self._hash = hash(self.start_coordinates) ^ hash(self.landing_coordinates)
 
     def __hash__(self):
-        return hash(self.start_coordinates) ^ hash(self.landing_coordinates)
+        return self._hash
 
     def __eq__(self, other):
-        return (self.start_coordinates == other.start_coordinates) and (self.direction_vector == other.direction_vector)
+        return self is other or (
+            (self.start_coordinates == other.start_coordinates) and (self.direction_vector == other.direction_vector)
+        )
 
 
 class Shape(Enum):
@@ -0,0 +1,284 @@
+import contextlib
+import ctypes
+import io
+import multiprocessing
+import random
+import time
+from multiprocessing.sharedctypes import RawArray, RawValue
+from typing import Hashable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from actor import Actor
+from config import Config
+from graph_world import GraphWorld
+from simulated_world import SimulatedWorld
+
+# One row per transition; pegs is the number of pegs left on the final transition of an episode and 0 otherwise
+TRANSITION_DTYPE = np.dtype([
+    ('state', np.uint64),
+    ('next_state', np.uint64),
+    ('action', np.int16),
+    ('reward', np.float32),
+    ('pegs', np.int16),
+])
+POLL_INTERVAL = 0.0005  # Seconds to sleep while a ring buffer is full or empty
+
+
+class TransitionRing:
+    """
+    Single-producer single-consumer ring buffer of transitions in shared memory
+
+    One rollout worker pushes whole episodes and the learner pops everything
+    pushed so far. The write and read counters only ever grow and each is
+    written by one side only, so no lock is needed: a push writes the
+    transitions before it advances the write counter.
+
+    ...
+
+    Attributes
+    ----------
+    capacity : int
+        Maximum number of stored transitions
+
+    Methods
+    -------
+    push(transitions):
+        Appends the transitions if they fit, and returns whether they did.
+    pop():
+        Removes and returns every stored transition.
+    """
+
+    def __init__(self, capacity: int):
+        assert capacity > 0, 'capacity must be positive'
+        self.capacity = capacity
+        self.__raw_counters = RawArray(ctypes.c_int64, 2)  # Transitions written, transitions read
+        self.__raw_transitions = RawArray(ctypes.c_uint8, capacity * TRANSITION_DTYPE.itemsize)
+        self.__attach()
+
+    def __attach(self) -> None:
+        self.__counters = np.frombuffer(self.__raw_counters, dtype=np.int64)
+        self.__transitions = np.frombuffer(self.__raw_transitions, dtype=TRANSITION_DTYPE)
+
+    def __getstate__(self):
+        return self.capacity, self.__raw_counters, self.__raw_transitions
+
+    def __setstate__(self, state):
+        self.capacity, self.__raw_counters, self.__raw_transitions = state
+        self.__attach()
+
+    def push(self, transitions: np.ndarray) -> bool:
+        """Appends the transitions if they fit, and returns whether they did."""
+        written, read = int(self.__counters[0]), int(self.__counters[1])
+        count = len(transitions)
+        assert count <= self.capacity, 'An episode does not fit in the ring buffer, increase RING_CAPACITY'
+        if written + count - read > self.capacity:
+            return False
+
+        start = written % self.capacity
+        first = min(count, self.capacity - start)
+        self.__transitions[start:start + first] = transitions[:first]
+        self.__transitions[:count - first] = transitions[first:]
+        self.__counters[0] = written + count
+        return True
+
+    def pop(self) -> np.ndarray:
+        """Removes and returns every stored transition."""
+        written, read = int(self.__counters[0]), int(self.__counters[1])
+        positions = np.arange(read, written) % self.capacity
+        transitions = self.__transitions[positions]
+        self.__counters[1] = written
+        return transitions
+
+
+class SharedPolicy:
+    """
+    Snapshot of the actor's policy in shared memory, published by the learner
+
+    Guarded by a sequence lock: the learner makes the sequence number odd while
+    it writes and even again once done, and readers retry when the number was
+    odd or changed while they copied. States are only ever appended to the
+    policy, so a publication writes the keys of the new states and every row.
+
+    ...
+
+    Attributes
+    ----------
+    capacity : int
+        Maximum number of states in a snapshot
+
+    Methods
+    -------
+    publish(states, policy, epsilon):
+        Writes a new snapshot.
+    read(sequence):
+        Returns (sequence, states, policy, epsilon) of the latest snapshot, or None if it is the given sequence.
+    """
+
+    def __init__(self, capacity: int, action_count: int):
+        self.capacity = capacity
+        self.__action_count = action_count
+        self.__raw_header = RawArray(ctypes.c_int64, 2)  # Sequence number, number of states
+        self.__raw_epsilon = RawValue(ctypes.c_double, 0.0)
+        self.__raw_keys = RawArray(ctypes.c_uint64, capacity)
+        self.__raw_policy = RawArray(ctypes.c_float, capacity * action_count)
+        self.__attach()
+
+    def __attach(self) -> None:
+        self.__header = np.frombuffer(self.__raw_header, dtype=np.int64)
+        self.__keys = np.frombuffer(self.__raw_keys, dtype=np.uint64)
+        self.__policy = np.frombuffer(self.__raw_policy, dtype=np.float32).reshape(self.capacity, self.__action_count)
+
+    def __getstate__(self):
+        return self.capacity, self.__action_count, self.__raw_header, self.__raw_epsilon, self.__raw_keys, self.__raw_policy
+
+    def __setstate__(self, state):
+        self.capacity, self.__action_count, self.__raw_header, self.__raw_epsilon, self.__raw_keys, self.__raw_policy = state
+        self.__attach()
+
+    def publish(self, states: Sequence[Hashable], policy: np.ndarray, epsilon: float) -> None:
+        """Writes a new snapshot."""
+        assert len(states) <= self.capacity, 'More states than the shared policy can hold'
+        published = int(self.__header[1])
+        self.__header[0] += 1
+        self.__keys[published:len(states)] = states[published:]
+        self.__policy[:len(states)] = policy
+        self.__raw_epsilon.value = epsilon
+        self.__header[1] = len(states)
+        self.__header[0] += 1
+
+    def read(self, sequence: int) -> Union[Tuple[int, List[int], np.ndarray, float], None]:
+        """Returns (sequence, states, policy, epsilon) of the latest snapshot, or None if it is the given sequence."""
+        while True:
+            current = int(self.__header[0])
+            if current == sequence:
+                return None
+            if current % 2:
+                time.sleep(0)
+                continue
+            rows = int(self.__header[1])
+            states = self.__keys[:rows].tolist()
+            policy = self.__policy[:rows].copy()
+            epsilon = self.__raw_epsilon.value
+            if int(self.__header[0]) == current:
+                return current, states, policy, epsilon
+
+
+def play_episode(world: Union[SimulatedWorld, GraphWorld], actor: Actor) -> np.ndarray:
+    """Plays one episode with the actor's policy and returns its transitions, without learning"""
+    state, possible_actions = world.reset()
+    action = actor.choose_action(state, possible_actions)
+    transitions = []
+    done = False
+    while not done:
+        next_state, reward, done, possible_actions = world.step(action, False)
+        transitions.append((state, next_state, action.id, reward, 0))
+        state, action = next_state, actor.choose_action(next_state, possible_actions)
+
+    transitions = np.array(transitions, dtype=TRANSITION_DTYPE)
+    transitions['pegs'][-1] = world.get_pegs_remaining()
+    return transitions
+
+
+def run_rollout_worker(config: Config, policy: SharedPolicy, ring: TransitionRing, stop, seed: int) -> None:
+    """
+    Plays episodes with the latest published policy and pushes them to the ring buffer until stopped.
+    Plays at most its share of policy_lag episodes per snapshot, so no episode is learned from more than
+    about policy_lag episodes after the snapshot it was played with.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        world = GraphWorld(config) if config.use_state_graph else SimulatedWorld(config)
+        actor = Actor.from_config(config, world.get_action_count())
+
+    episodes_per_snapshot = -(-config.policy_lag // config.num_workers)
+    sequence = 0  # Nothing is published yet
+    played_episodes = episodes_per_snapshot
+    while not stop.value:
+        snapshot = policy.read(sequence)
+        if snapshot is not None:
+            sequence, states, preferences, epsilon = snapshot
+            actor.set_policy(states, preferences, epsilon)
+            played_episodes = 0
+        elif played_episodes == episodes_per_snapshot:
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        transitions = play_episode(world, actor)
+        while not ring.push(transitions):
+            if stop.value:
+                return
+            time.sleep(POLL_INTERVAL)
+        played_episodes += 1
+
+
+class RolloutWorkers:
+    """
+    Worker processes playing episodes for a central learner
+
+    Every worker has its own simulated world and a copy of the actor, which it
+    refreshes from the shared policy before each episode once the learner has
+    published a new snapshot, and waits for one after its share of policy_lag episodes. Finished episodes are pushed through one shared
+    memory ring buffer per worker as compact (state id, action id, reward)
+    transitions, so acting and stepping run in parallel with learning.
+
+    ...
+
+    Attributes
+    ----------
+    policy_capacity : int
+        Maximum number of states in a published policy
+
+    Methods
+    -------
+    publish(states, policy, epsilon):
+        Publishes a policy snapshot to the workers.
+    collect():
+        Waits for finished episodes and returns them, one transition array per episode.
+    close():
+        Stops the workers and returns the episodes they finished but that were not collected.
+    """
+
+    def __init__(self, config: Config, action_count: int, policy_capacity: int, seed: int):
+        assert config.num_workers > 0, 'num_workers must be positive'
+        self.policy_capacity = policy_capacity
+        self.__policy = SharedPolicy(policy_capacity, action_count)
+        self.__rings = [TransitionRing(config.ring_capacity) for _ in range(config.num_workers)]
+        self.__stop = RawValue(ctypes.c_bool, False)
+        self.__processes = [
+            multiprocessing.Process(target=run_rollout_worker, args=(config, self.__policy, ring, self.__stop, seed + index), daemon=True)
+            for index, ring in enumerate(self.__rings)
+        ]
+        for process in self.__processes:
+            process.start()
+
+    def publish(self, states: Sequence[Hashable], policy: np.ndarray, epsilon: float) -> None:
+        """Publishes a policy snapshot to the workers."""
+        self.__policy.publish(states, policy, epsilon)
+
+    def __pop_episodes(self) -> List[np.ndarray]:
+        episodes = []
+        for ring in self.__rings:
+            transitions = ring.pop()
+            ends = np.flatnonzero(transitions['pegs']) + 1
+            episodes.extend(np.split(transitions, ends[:-1]) if len(ends) else [])
+        return episodes
+
+    def collect(self) -> List[np.ndarray]:
+        """Waits for finished episodes and returns them, one transition array per episode."""
+        while True:
+            episodes = self.__pop_episodes()
+            if episodes:
+                return episodes
+            assert all(process.is_alive() for process in self.__processes), 'A rollout worker stopped unexpectedly'
+            time.sleep(POLL_INTERVAL)
+
+    def close(self) -> List[np.ndarray]:
+        """Stops the workers and returns the episodes they finished but that were not collected."""
+        self.__stop.value = True
+        for process in self.__processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        return self.__pop_episodes()
@@ -0,0 +1,91 @@
+from typing import Dict, Hashable, Union
+
+import numpy as np
+
+
+class SparseTraces:
+    """
+    Replacing eligibility traces that only keep the live entries
+
+    Keys and trace values are stored as parallel arrays. Every decay multiplies
+    the values by the trace decay factor (gamma * lambda) and drops the entries
+    that are no longer above the threshold, so updates only touch live traces.
+
+    ...
+
+    Methods
+    -------
+    replace(key):
+        Replaces trace e(key) with 1.0
+    decay():
+        Decays every trace and drops the ones at or below the threshold.
+    keys():
+        Keys of the live traces.
+    values():
+        Values of the live traces, parallel to keys().
+    reset():
+        Drops all traces.
+    """
+
+    def __init__(self, decay: float, threshold: float, key_dtype=object, capacity: int = 64):
+        self.__decay = decay
+        self.__threshold = threshold
+        self.__keys = np.empty(capacity, dtype=key_dtype)
+        self.__values = np.zeros(capacity, dtype=np.float64)
+        self.__slots: Dict[Hashable, int] = {}
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def keys(self) -> np.ndarray:
+        """Keys of the live traces."""
+        return self.__keys[:self.__size]
+
+    def values(self) -> np.ndarray:
+        """Values of the live traces, parallel to keys()."""
+        return self.__values[:self.__size]
+
+    def replace(self, key: Hashable) -> None:
+        """Replaces trace e(key) with 1.0"""
+        slot = self.__slots.get(key)
+        if slot is None:
+            if self.__size == len(self.__keys):
+                self.__keys = np.concatenate((self.__keys, np.empty_like(self.__keys)))
+                self.__values = np.concatenate((self.__values, np.zeros_like(self.__values)))
+            slot = self.__size
+            self.__keys[slot] = key
+            self.__slots[key] = slot
+            self.__size += 1
+        self.__values[slot] = 1.0
+
+    def decay(self) -> None:
+        """Decays every trace and drops the ones at or below the threshold."""
+        values = self.__values[:self.__size]
+        values *= self.__decay
+
+        live = values > self.__threshold
+        if not live.all():
+            live_slots = np.flatnonzero(live)
+            self.__size = len(live_slots)
+            self.__keys[:self.__size] = self.__keys[live_slots]
+            self.__values[:self.__size] = values[live_slots]
+            self.__slots = {key: slot for slot, key in enumerate(self.__keys[:self.__size].tolist())}
+
+    def reset(self) -> None:
+        """Drops all traces."""
+        self.__slots = {}
+        self.__size = 0
+
+
+def discounted_reverse_sum(values: np.ndarray, decay: float, horizon: Union[int, None] = None) -> np.ndarray:
+    """
+    Forward-view sums out[t] = sum_k decay^k * values[t + k] of an episode, for k < horizon if given.
+    Summing the TD errors with decay = gamma * lambda gives the offline lambda-return errors, which equal
+    the total update of backward-view traces over the episode when no state repeats.
+    Computed as one triangular matrix product, as episodes are short.
+    """
+    lags = np.arange(len(values))[np.newaxis, :] - np.arange(len(values))[:, np.newaxis]
+    in_window = (lags >= 0) if horizon is None else (lags >= 0) & (lags < horizon)
+    weights = np.where(in_window, decay ** np.maximum(lags, 0), 0.0)
+    return weights @ np.asarray(values, dtype=np.float64)
@@ -0,0 +1,116 @@
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from board_geometry import BoardGeometry
+from config import Config
+from data_classes import Action
+from state_graph import StateGraph
+from visualize import Visualize
+
+
+class GraphWorld:
+    """
+    Plays the game by lookups in a precomputed StateGraph instead of simulating a board
+
+    Same interface as SimulatedWorld. States are identified by their index in
+    the graph, which is loaded memory mapped and built on first use.
+
+    ...
+
+    Methods
+    -------
+    reset():
+        Returns the start state and its legal actions.
+    step(action, visualize):
+        Performs the action and returns (next state, reward, final state flag, legal actions).
+    get_state_vector():
+        Playable cells of the current board in row-major order (1 = peg, 2 = empty).
+    get_pegs_remaining():
+        Pegs left on the current board.
+    """
+
+    def __init__(self, config: Config):
+        assert not config.canonicalize_states, 'The state graph does not canonicalize states'
+        self.__config = config
+        self.__board_type = config.board_type
+        self.__size = config.size
+        self.__geometry = BoardGeometry.get(config.board_type, config.size)
+        self.__graph = StateGraph.load_or_build(config.board_type, config.size, config.holes)
+        self.__visualize = Visualize(config.frame_delay)
+
+        initial_pegs = (1 << len(self.__geometry.cells)) - 1
+        for hole in config.holes:
+            if hole in self.__geometry.cell_index:
+                initial_pegs &= ~(1 << self.__geometry.cell_index[hole])
+        self.__initial_state = self.__graph.index(initial_pegs)
+        self.__state = self.__initial_state
+        self.__peg_history = []
+
+        self.__visualize.initialize_board(self.__get_board(), self.__geometry.edges, self.__board_type)
+        print(f'State graph: {len(self.__graph)} states, {len(self.__graph.successors)} transitions')
+
+    def __get_pegs(self) -> int:
+        return int(self.__graph.states[self.__state])
+
+    def __get_board(self) -> np.ndarray:
+        board = np.zeros((self.__size, self.__size), dtype=np.int8)
+        pegs = self.__get_pegs()
+        for index, cell in enumerate(self.__geometry.cells):
+            board[cell] = 1 if pegs >> index & 1 else 2
+        return board
+
+    def __get_legal_actions(self) -> Tuple[Action]:
+        start, end = self.__graph.offsets[self.__state:self.__state + 2]
+        return tuple(self.__geometry.actions[action_id] for action_id in self.__graph.action_ids[start:end].tolist())
+
+    def __calculate_reward(self, is_final_state: bool) -> int:
+        if self.__graph.winning[self.__state]:
+            return self.__config.winning_reward
+        elif is_final_state:
+            return self.__config.losing_reward
+        else:
+            return self.__config.step_reward
+
+    def get_state_vector(self) -> Tuple[int]:
+        """Playable cells of the current board in row-major order (1 = peg, 2 = empty), e.g. as NN critic input"""
+        pegs = self.__get_pegs()
+        return tuple(1 if pegs >> index & 1 else 2 for index in range(len(self.__geometry.cells)))
+
+    def step(self, action: Union[Action, None], visualize: bool) -> Tuple[int, int, bool, Tuple[Action]]:
+        """Performs the action and returns (next state, reward, final state flag, legal actions)."""
+        assert action is not None, 'No actions found. Cannot play game.'
+        start, end = self.__graph.offsets[self.__state:self.__state + 2]
+        position = start + int(np.searchsorted(self.__graph.action_ids[start:end], action.id))
+        assert position < end and self.__graph.action_ids[position] == action.id, 'Illegal action.'
+        self.__state = int(self.__graph.successors[position])
+
+        if visualize:
+            self.__visualize.draw_board(self.__board_type, self.__get_board(), action.positions)
+
+        is_final_state = bool(self.__graph.terminal[self.__state])
+        return self.__state, self.__calculate_reward(is_final_state), is_final_state, self.__get_legal_actions()
+
+    def reset(self) -> Tuple[int, Tuple[Action]]:
+        self.__peg_history.append(bin(self.__get_pegs()).count('1'))  # Used for plotting
+        self.__state = self.__initial_state
+        return self.__state, self.__get_legal_actions()
+
+    def get_action_count(self) -> int:
+        """Number of actions in the board's action catalogue, i.e. one more than the largest action id"""
+        return len(self.__geometry.actions)
+
+    def report_cache_statistics(self) -> None:
+        """Not used by GraphWorld."""
+        pass
+
+    def get_pegs_remaining(self) -> int:
+        """Pegs left on the current board"""
+        return bin(self.__get_pegs()).count('1')
+
+    def get_peg_history(self) -> List[int]:
+        """Pegs left at the end of every episode, once the current episode is finished"""
+        return self.__peg_history[1:] + [bin(self.__get_pegs()).count('1')]
+
+    def plot_training_data(self) -> None:
+        Visualize.plot_training_data(self.get_peg_history())
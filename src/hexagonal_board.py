@@ -1,25 +1,46 @@
 from abc import ABC
-from typing import List, Set, Tuple
+from typing import FrozenSet, List, Set, Tuple, Union
 
 import numpy as np
 
+from board_geometry import BoardGeometry
 from data_classes import Action, Shape
 from visualize import Visualize
 
 
 class HexagonalBoard(ABC):
 
-    def __init__(self, board_type: Shape, size: int, holes: Set[Tuple[int, int]]):
+    def __init__(self, board_type: Shape, size: int, holes: Set[Tuple[int, int]], visualize: Union[Visualize, None] = None):
         self.__board_type = board_type
+        self.__visualize = visualize
         self.__size: int = size
         self.__holes = holes
+        self.__geometry = BoardGeometry.get(board_type, size)
         self.__board = None
         self._edges: Set[Tuple[int, int]] = set()
         self.__set_initial_state()
 
+        # Legal moves are kept up to date by make_move instead of rescanning the board
+        self.__initial_legal_action_ids: FrozenSet[int] = frozenset(action.id for action in self.__scan_legal_actions())
+        self.__legal_action_ids: Set[int] = set(self.__initial_legal_action_ids)
+        self.__legal_actions: Union[Tuple[Action], None] = None
+
+        self.__initial_hash = self.__geometry.hash_pegs(
+            index for index, cell in enumerate(self.__geometry.cells) if self.__board[cell] == 1
+        )
+        self.__hash = self.__initial_hash
+
     def get_board(self):
         return self.__board
 
+    def get_state_key(self) -> int:
+        """Zobrist hash of the board, updated incrementally by make_move"""
+        return self.__hash
+
+    def get_cell_values(self) -> Tuple[int]:
+        """Playable cells in row-major order (1 = peg, 2 = empty)"""
+        return tuple(filter(lambda cell: bool(cell), self.__board.flatten()))
+
     def __set_initial_state(self) -> None:
         self.__board = np.ones((self.__size, self.__size), dtype=np.int8)
         if self.__board_type == Shape.Triangle:
@@ -32,15 +53,21 @@ class HexagonalBoard(ABC):
 
     def reset_game(self) -> None:
         self.__set_initial_state()
+        self.__legal_action_ids = set(self.__initial_legal_action_ids)
+        self.__legal_actions = None
+        self.__hash = self.__initial_hash
 
     def __draw_board(self, action: Action) -> None:
-        Visualize.draw_board(self.__board_type, self.__board, action.positions)
+        assert self.__visualize is not None, 'The board was created without a Visualize instance'
+        self.__visualize.draw_board(self.__board_type, self.__board, action.positions)
 
     def make_move(self, action: Action, visualize: bool) -> None:
         if self.__is_legal_action(action):
             self.__board[action.start_coordinates] = 2
             self.__board[action.adjacent_coordinates] = 2
             self.__board[action.landing_coordinates] = 1
+            self.__update_legal_actions(action)
+            self.__hash ^= self.__geometry.action_hashes[action.id]
 
             if visualize:
                 self.__draw_board(action)
@@ -49,7 +76,19 @@ class HexagonalBoard(ABC):
         return (self.__board == 1).sum()
 
     def game_over(self) -> bool:
-        return len(self.get_all_legal_actions()) < 1
+        return len(self.__legal_action_ids) < 1
+
+    def __update_legal_actions(self, action: Action) -> None:
+        """Re-checks only the moves that touch one of the three cells changed by action"""
+        for coordinates in action.positions:
+            for affected_action in self.__geometry.actions_by_cell[self.__geometry.cell_index[coordinates]]:
+                if self.__board[affected_action.start_coordinates] == 1 \
+                        and self.__board[affected_action.adjacent_coordinates] == 1 \
+                        and self.__board[affected_action.landing_coordinates] == 2:
+                    self.__legal_action_ids.add(affected_action.id)
+                else:
+                    self.__legal_action_ids.discard(affected_action.id)
+        self.__legal_actions = None
 
     def __is_legal_action(self, action: Action) -> bool:
         return self.__action_is_inside_board(action) \
@@ -68,13 +107,17 @@ class HexagonalBoard(ABC):
 
     def __get_legal_actions_for_coordinates(self, coordinates: Tuple[int, int]) -> Tuple[Action]:
         legal_actions: List[Action] = []
-        for direction_vector in self._edges:
-            action = Action(coordinates, direction_vector)
+        for action in self.__geometry.actions_by_start[self.__geometry.cell_index[coordinates]]:
             if self.__is_legal_action(action):
                 legal_actions.append(action)
         return tuple(legal_actions)
 
     def get_all_legal_actions(self) -> Tuple[Action]:
+        if self.__legal_actions is None:
+            self.__legal_actions = tuple(self.__geometry.actions[action_id] for action_id in sorted(self.__legal_action_ids))
+        return self.__legal_actions
+
+    def __scan_legal_actions(self) -> Tuple[Action]:
         legal_actions: List[Action] = []
         for i in range(self.__board.shape[0]):
             for j in range(self.__board.shape[0]):
@@ -89,11 +132,12 @@ class HexagonalBoard(ABC):
 
 
 class Diamond(HexagonalBoard):
-    def __init__(self, board_type: Shape, size: int, holes: Set[Tuple[int, int]]):
+    def __init__(self, board_type: Shape, size: int, holes: Set[Tuple[int, int]], visualize: Union[Visualize, None] = None):
         super().__init__(
             board_type,
             size,
             holes,
+            visualize,
         )
         self._edges = set([
             (0, -1),
@@ -106,11 +150,12 @@ class Diamond(HexagonalBoard):
 
 
 class Triangle(HexagonalBoard):
-    def __init__(self, board_type: Shape, size: int, holes: Set[Tuple[int, int]]):
+    def __init__(self, board_type: Shape, size: int, holes: Set[Tuple[int, int]], visualize: Union[Visualize, None] = None):
         super().__init__(
             board_type,
             size,
             holes,
+            visualize,
         )
         self._edges = set([
             (0, -1),
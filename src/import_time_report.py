@@ -0,0 +1,73 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+HEAVY_MODULES = ('matplotlib', 'networkx', 'tensorflow', 'keras')
+
+# Builds a learner and trains one episode, as a short run does before its real work
+STARTUP_SCRIPT = '''
+import sys
+import time
+
+start = time.perf_counter()
+from config import Config
+from reinforcement_learner import ReinforcementLearner
+
+learner = ReinforcementLearner(Config.load({parameter_file!r}, {{'HEADLESS': {headless}, 'EPISODES': 1}}))
+learner.train()
+print(f'startup {{time.perf_counter() - start}}', file=sys.stderr)
+'''
+IMPORT_TIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure_startup(parameter_file: str, headless: bool) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """
+    Runs the startup script in a fresh interpreter with -X importtime.
+    Returns (startup seconds, [(module, depth, self microseconds, cumulative microseconds)] in import order).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT.format(parameter_file=parameter_file, headless=headless)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    modules, startup = [], 0.0
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_time, cumulative_time, indent, module = match.groups()
+            modules.append((module, len(indent) // 2, int(self_time), int(cumulative_time)))
+        elif line.startswith('startup '):
+            startup = float(line.split()[1])
+    return startup, modules
+
+
+def format_report(startup: float, modules: List[Tuple[str, int, int, int]], top: int) -> str:
+    """The slowest top-level imports, whether any heavy library was loaded, and the startup time"""
+    top_level = sorted((module for module in modules if module[1] == 0), key=lambda module: -module[3])
+    lines = [f'{"cumulative":>12} {"self":>10}  module']
+    for module, _, self_time, cumulative_time in top_level[:top]:
+        lines.append(f'{cumulative_time / 1000:>10.1f}ms {self_time / 1000:>8.1f}ms  {module}')
+
+    loaded: Dict[str, int] = {module: cumulative_time for module, _, _, cumulative_time in modules if module in HEAVY_MODULES}
+    lines.append('')
+    for root in HEAVY_MODULES:
+        lines.append(f'{root:<12} ' + (f'loaded ({loaded[root] / 1000:.1f}ms)' if root in loaded else 'not loaded'))
+    lines.append('')
+    lines.append(f'{len(modules)} modules imported, startup to the end of the first episode in {startup:.3f}s')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reports which modules a short training run imports and how long it takes to start.')
+    parser.add_argument('parameter_file', nargs='?', default='D2_table_critic_triangle_5', help='Parameter file name')
+    parser.add_argument('--top', type=int, default=15, help='Number of top-level imports to list')
+    parser.add_argument('--not-headless', dest='headless', action='store_false', help='Runs with HEADLESS = False')
+    arguments = parser.parse_args()
+
+    print(format_report(*measure_startup(arguments.parameter_file, arguments.headless), arguments.top))
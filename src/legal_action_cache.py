@@ -0,0 +1,142 @@
+import sys
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Tuple, Union
+
+from data_classes import Action
+
+
+class LegalActionCache:
+    """
+    Bounded cache mapping a state to its legal actions
+
+    ...
+
+    Attributes
+    ----------
+    policy : str
+        'lru' evicts the least recently used state, 'clock' approximates LRU
+        with one reference bit per entry, 'off' stores nothing
+    max_entries : int
+        Maximum number of cached states
+
+    Methods
+    -------
+    get(state):
+        Returns the cached legal actions for the state, or None on a miss.
+    put(state, legal_actions):
+        Caches the legal actions for the state, evicting an entry if the cache is full.
+    report():
+        Returns hit, miss and eviction counts and the approximate memory used.
+    """
+
+    POLICIES = ('lru', 'clock', 'off')
+
+    def __init__(self, policy: str, max_entries: int):
+        assert policy in self.POLICIES, f'Unknown legal action cache policy: {policy}'
+        assert policy == 'off' or max_entries > 0, 'max_entries must be positive'
+        self.policy = policy
+        self.max_entries = max_entries
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+        # LRU: most recently used entries are kept at the end
+        self.__lru_entries: OrderedDict = OrderedDict()
+
+        # Clock: fixed slots with a reference bit each, swept by a clock hand
+        self.__clock_slots: Dict[Hashable, int] = {}
+        self.__clock_states: List[Hashable] = []
+        self.__clock_values: List[Tuple[Action]] = []
+        self.__clock_referenced: List[bool] = []
+        self.__clock_hand = 0
+
+    def __len__(self) -> int:
+        return len(self.__lru_entries) if self.policy == 'lru' else len(self.__clock_slots)
+
+    def get(self, state: Hashable) -> Union[Tuple[Action], None]:
+        """Returns the cached legal actions for the state, or None on a miss."""
+        if self.policy == 'lru':
+            legal_actions = self.__lru_entries.get(state)
+            if legal_actions is not None:
+                self.__lru_entries.move_to_end(state)
+        elif self.policy == 'clock':
+            slot = self.__clock_slots.get(state)
+            legal_actions = None
+            if slot is not None:
+                self.__clock_referenced[slot] = True
+                legal_actions = self.__clock_values[slot]
+        else:
+            legal_actions = None
+
+        if legal_actions is None:
+            self.__misses += 1
+        else:
+            self.__hits += 1
+        return legal_actions
+
+    def put(self, state: Hashable, legal_actions: Tuple[Action]) -> None:
+        """Caches the legal actions for the state, evicting an entry if the cache is full."""
+        if self.policy == 'lru':
+            self.__lru_entries[state] = legal_actions
+            self.__lru_entries.move_to_end(state)
+            if len(self.__lru_entries) > self.max_entries:
+                self.__lru_entries.popitem(last=False)
+                self.__evictions += 1
+        elif self.policy == 'clock':
+            self.__put_clock(state, legal_actions)
+
+    def __put_clock(self, state: Hashable, legal_actions: Tuple[Action]) -> None:
+        if state in self.__clock_slots:
+            slot = self.__clock_slots[state]
+            self.__clock_values[slot] = legal_actions
+            self.__clock_referenced[slot] = True
+            return
+
+        if len(self.__clock_states) < self.max_entries:
+            self.__clock_slots[state] = len(self.__clock_states)
+            self.__clock_states.append(state)
+            self.__clock_values.append(legal_actions)
+            self.__clock_referenced.append(False)
+            return
+
+        # Give referenced entries a second chance until an unreferenced victim is found
+        while self.__clock_referenced[self.__clock_hand]:
+            self.__clock_referenced[self.__clock_hand] = False
+            self.__clock_hand = (self.__clock_hand + 1) % self.max_entries
+
+        slot = self.__clock_hand
+        del self.__clock_slots[self.__clock_states[slot]]
+        self.__evictions += 1
+
+        self.__clock_slots[state] = slot
+        self.__clock_states[slot] = state
+        self.__clock_values[slot] = legal_actions
+        self.__clock_referenced[slot] = False
+        self.__clock_hand = (slot + 1) % self.max_entries
+
+    def approximate_bytes(self) -> int:
+        """
+        Approximate memory used by the cache: the containers, the state keys
+        and the action tuples. Actions are shared, so they are not counted.
+        """
+        if self.policy == 'lru':
+            entries = self.__lru_entries.items()
+            total = sys.getsizeof(self.__lru_entries)
+        else:
+            entries = zip(self.__clock_states, self.__clock_values)
+            total = sys.getsizeof(self.__clock_slots) + sys.getsizeof(self.__clock_states) \
+                + sys.getsizeof(self.__clock_values) + sys.getsizeof(self.__clock_referenced)
+        for state, legal_actions in entries:
+            total += sys.getsizeof(state) + sys.getsizeof(legal_actions)
+        return total
+
+    def report(self) -> str:
+        """Returns hit, miss and eviction counts and the approximate memory used."""
+        lookups = self.__hits + self.__misses
+        hit_rate = self.__hits / lookups if lookups else 0.0
+        return (
+            f'Legal action cache ({self.policy}, max {self.max_entries} entries): '
+            f'{len(self)} entries, {self.__hits} hits, {self.__misses} misses ({hit_rate:.1%} hit rate), '
+            f'{self.__evictions} evictions, ~{self.approximate_bytes() / 1024:.1f} KiB'
+        )
@@ -1,5 +1,7 @@
+import parameters
+from config import Config
 from reinforcement_learner import ReinforcementLearner
 
 if __name__ == "__main__":
-    agent = ReinforcementLearner()
+    agent = ReinforcementLearner(Config.from_module(parameters))
     agent.run()
@@ -4,6 +4,7 @@ from data_classes import Shape
 EPISODES = 175
 VISUALIZE_GAMES = False
 FRAME_DELAY = 0.15
+HEADLESS = False  # Skips plots, the greedy game and model summaries; matplotlib and networkx are then never imported
 
 # Simulated World
 BOARD_TYPE = Shape.Diamond
@@ -17,11 +18,29 @@ HOLES = set([
 WINNING_REWARD = 10
 LOSING_REWARD = -1
 STEP_REWARD = 0
+USE_BITBOARD = True
+LEGAL_ACTION_CACHE_POLICY = 'lru'  # 'lru', 'clock' or 'off'
+LEGAL_ACTION_CACHE_SIZE = 100000
+NUMBER_OF_BOARDS = 1  # Boards simulated at once; > 1 uses the vectorized world
+ZOBRIST_DEBUG = False  # Checks every state key for hash collisions
+CANONICALIZE_STATES = False  # Shares learning between positions that are symmetric on the board
+USE_STATE_GRAPH = False  # Plays by lookups in the precomputed state graph (see state_graph.py)
+LEARNING_MODE = 'online'  # 'online' updates every step, 'episode' applies lambda-return updates once per episode
+
+# Planning
+PLANNING_STEPS = 0  # Simulated transitions replayed after each real step; 0 disables planning (table critic only)
+PLANNING_PRIORITY_THRESHOLD = 1e-4  # Smallest |TD error| queued for planning
+
+# Rollout workers
+NUM_WORKERS = 0  # Processes playing episodes for this learner (table critic only); 0 plays in the learner process
+POLICY_LAG = 10  # Episodes learned between two policy snapshots; the workers play as many per snapshot
+RING_CAPACITY = 4096  # Transitions buffered per worker
 
 # Actor
 ACTOR_LEARNING_RATE = 0.001
 ACTOR_DISCOUNT_FACTOR = 0.92
 ACTOR_TRACE_DECAY = 0.9
+ACTOR_TRACE_HORIZON = 20  # Steps a trace is kept after its last replacement
 
 ACTOR_EPSILON = 1
 ACTOR_EPSILON_DECAY = 0.994
@@ -33,4 +52,9 @@ CRITIC_TRACE_DECAY = 0.9
 
 USE_TABLE_CRITIC = False
 INPUT_DIMENSION = SIZE ** 2 if BOARD_TYPE == Shape.Diamond else int((SIZE * (SIZE + 1)) / 2)
+CRITIC_NN_BACKEND = 'tensorflow'  # 'tensorflow' or 'numpy'
 CRITIC_NN_DIMENSIONS = (INPUT_DIMENSION, 20, 30, 5, 1)
+CRITIC_REPLAY_CAPACITY = 0  # Replay buffer size of the NN critic; 0 trains online with eligibility traces
+CRITIC_REPLAY_BATCH_SIZE = 32
+CRITIC_REPLAY_INTERVAL = 4  # Steps between two replay mini-batches
+CRITIC_REPLAY_PRIORITIZED = False  # Samples mini-batches by |TD error|
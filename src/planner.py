@@ -0,0 +1,91 @@
+import heapq
+from typing import Dict, Hashable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from actor import Actor
+from critic.critic import Critic
+from data_classes import Action
+
+
+class Planner:
+    """
+    Dyna-style planning with prioritized sweeping
+
+    The game is deterministic, so every real transition is stored as the model
+    (state, action) -> (reward, next state). State-action pairs are queued by
+    the magnitude of their TD error. Each planning phase pops up to
+    planning_steps pairs, applies one-step TD updates to the critic and actor
+    tables, and queues the predecessors of the updated state whose TD error
+    changed by more than the threshold.
+
+    ...
+
+    Attributes
+    ----------
+    planning_steps : int
+        Maximum number of simulated transitions per planning phase
+    priority_threshold : float
+        Smallest |TD error| that is queued
+
+    Methods
+    -------
+    observe(state, action, reward, next_state):
+        Adds a real transition to the model and queues it.
+    plan():
+        Replays up to planning_steps simulated transitions in priority order.
+    """
+
+    def __init__(self, critic: Critic, actor: Actor, planning_steps: int, priority_threshold: float):
+        assert not critic.requires_state_vector(), 'Planning needs a critic that takes state keys, i.e. the table critic'
+        self.__critic = critic
+        self.__actor = actor
+        self.planning_steps = planning_steps
+        self.priority_threshold = priority_threshold
+
+        self.__model: Dict[Tuple[Hashable, int], Tuple[float, Hashable]] = {}
+        self.__predecessors: Dict[Hashable, Set[Tuple[Hashable, Action]]] = {}
+
+        # Max-heap of (-priority, insertion order, state, action); entries whose priority changed are skipped
+        self.__queue: List[Tuple[float, int, Hashable, Action]] = []
+        self.__priorities: Dict[Tuple[Hashable, int], float] = {}
+        self.__insertions = 0
+
+    def __queue_transitions(self, transitions: Sequence[Tuple[Hashable, Action]]) -> None:
+        """Queues the state-action pairs whose |TD error| is above the threshold, scored in one batch"""
+        if not transitions:
+            return
+        rewards, next_states = zip(*(self.__model[(state, action.id)] for state, action in transitions))
+        states = [state for state, _ in transitions]
+        priorities = np.abs(self.__critic.td_errors(np.array(rewards, dtype=np.float64), next_states, states))
+
+        for (state, action), priority in zip(transitions, priorities.tolist()):
+            key = (state, action.id)
+            if priority > self.priority_threshold and priority > self.__priorities.get(key, 0.0):
+                self.__priorities[key] = priority
+                heapq.heappush(self.__queue, (-priority, self.__insertions, state, action))
+                self.__insertions += 1
+
+    def observe(self, state: Hashable, action: Action, reward: float, next_state: Hashable) -> None:
+        """Adds a real transition to the model and queues it."""
+        self.__model[(state, action.id)] = (reward, next_state)
+        self.__predecessors.setdefault(next_state, set()).add((state, action))
+        self.__queue_transitions([(state, action)])
+
+    def plan(self) -> None:
+        """Replays up to planning_steps simulated transitions in priority order."""
+        steps = 0
+        while steps < self.planning_steps and self.__queue:
+            negative_priority, _, state, action = heapq.heappop(self.__queue)
+            key = (state, action.id)
+            if self.__priorities.get(key) != -negative_priority:
+                continue  # Stale entry, the pair was queued again with a higher priority
+            del self.__priorities[key]
+            steps += 1
+
+            reward, next_state = self.__model[key]
+            td_error = self.__critic.td_error(reward, next_state, state)
+            self.__critic.apply_td_error(state, td_error)
+            self.__actor.apply_td_error(state, action, td_error)
+
+            self.__queue_transitions(list(self.__predecessors.get(state, ())))
@@ -1,7 +1,20 @@
-import parameters
+import random
+from collections import deque
+from typing import Deque, Hashable, List, Tuple, Union
+
+import numpy as np
+
 from actor import Actor
+from board_geometry import BoardGeometry
+from config import Config
 from critic.critic_factory import CriticFactory
+from data_classes import Action
+from distributed import RolloutWorkers
+from graph_world import GraphWorld
+from planner import Planner
 from simulated_world import SimulatedWorld
+from vectorized_world import VectorizedWorld
+from visualize import Visualize
 
 
 class ReinforcementLearner:
@@ -12,70 +25,250 @@ class ReinforcementLearner:
 
     Attributes
     ----------
+    config : Config
+        Parameters of the learner
 
     Methods
     -------
+    train(episodes):
+        Runs training episodes, without plotting or visualization
+    get_peg_history():
+        Pegs left at the end of every training episode
     run():
         Runs all episodes with pivotal parameters
     """
 
-    def __init__(self):
-        self.__actor = Actor(
-            parameters.ACTOR_LEARNING_RATE,
-            parameters.ACTOR_DISCOUNT_FACTOR,
-            parameters.ACTOR_TRACE_DECAY,
-            parameters.ACTOR_EPSILON,
-            parameters.ACTOR_EPSILON_DECAY,
-        )
-        self.__critic = CriticFactory.get_critic(
-            parameters.USE_TABLE_CRITIC,
-            parameters.CRITIC_LEARNING_RATE,
-            parameters.CRITIC_DISCOUNT_FACTOR,
-            parameters.CRITIC_TRACE_DECAY,
-            parameters.CRITIC_NN_DIMENSIONS,
-        )
-
-        self.__simulated_world = SimulatedWorld()
-        self.__episodes = parameters.EPISODES
+    def __init__(self, config: Config):
+        self.config = config
+        self.__simulated_world = GraphWorld(config) if config.use_state_graph else SimulatedWorld(config)
+        self.__vectorized_world = VectorizedWorld(config) if config.number_of_boards > 1 else None
+        self.__episodes = config.episodes
+        self.__trained_episodes = 0
+        self.__peg_history: List[int] = []  # Only used with the vectorized world or rollout workers
+        self.__board_transitions: Union[List[List[Tuple[int, Hashable, Action, float, int, Hashable]]], None] = None
+        self.__finished_boards: List[Tuple[int, int]] = []  # (board, pegs left) of finished episodes not yet learned from
+        self.__pending_episodes: Deque[np.ndarray] = deque()  # Episodes played by rollout workers not yet learned from
+        self.__learn_per_episode = config.learning_mode == 'episode'
 
-    def __run_one_episode(self, visualize: bool = False) -> None:
+        self.__actor = Actor.from_config(config, self.__simulated_world.get_action_count())
+        self.__critic = CriticFactory.from_config(config)
+        assert config.num_workers == 0 or not self.__critic.requires_state_vector(), \
+            'Rollout workers send state keys, so they need a critic that takes state keys, i.e. the table critic'
+        assert config.num_workers == 0 or config.number_of_boards == 1, 'Rollout workers do not use the vectorized world'
+        self.__planner = None
+        if config.planning_steps > 0:
+            self.__planner = Planner(self.__critic, self.__actor, config.planning_steps, config.planning_priority_threshold)
+
+    def __learn(
+        self,
+        state: int,
+        critic_state: Hashable,
+        action: Action,
+        reward: float,
+        next_state: int,
+        next_critic_state: Hashable,
+    ) -> None:
+        """
+        Updates the critic and the actor from one transition, followed by a planning phase if enabled.
+        States are state keys; critic states are state vectors if the critic requires them and state keys otherwise.
+        """
+        self.__actor.replace_eligibilities(state, action)
+        self.__critic.replace_eligibilities(critic_state)
+
+        td_error = self.__critic.update(reward, next_critic_state, critic_state)
+        self.__actor.update(td_error)
+
+        if self.__planner is not None:
+            self.__planner.observe(state, action, reward, next_state)
+            self.__planner.plan()
+
+    def __learn_episode(self, transitions: List[Tuple[int, Hashable, Action, float, int, Hashable]]) -> None:
+        """
+        Updates the critic and the actor from a whole episode of transitions, followed by a planning phase if enabled.
+        In the episode learning mode the offline lambda-return updates are applied at once, otherwise step by step.
+        The eligibilities are expected to be reset at the start of the episode.
+        """
+        if not self.__learn_per_episode:
+            for transition in transitions:
+                self.__learn(*transition)
+            return
+
+        states, critic_states, actions, rewards, next_states, next_critic_states = zip(*transitions)
+        td_errors = self.__critic.update_episode(np.array(rewards, dtype=np.float64), next_critic_states, critic_states)
+        self.__actor.update_episode(states, actions, td_errors)
+
+        if self.__planner is not None:
+            for state, action, reward, next_state in zip(states, actions, rewards, next_states):
+                self.__planner.observe(state, action, reward, next_state)
+            self.__planner.plan()
+
+    def __reset_eligibilities(self) -> None:
         self.__actor.reset_eligibilities()
         self.__critic.reset_eligibilities()
 
+    def __get_critic_state(self, state: int) -> Hashable:
+        """The state as seen by the critic; the state vector is only built when the critic requires it"""
+        return self.__simulated_world.get_state_vector() if self.__critic.requires_state_vector() else state
+
+    def __run_one_episode(self, visualize: bool = False) -> None:
+        self.__reset_eligibilities()
+
         state, possible_actions = self.__simulated_world.reset()
+        critic_state = self.__get_critic_state(state)
         action = self.__actor.choose_action(state, possible_actions)
 
         done = False
+        transitions = []
 
         while not done:
             next_state, reward, done, possible_actions = self.__simulated_world.step(action, visualize)
+            next_critic_state = self.__get_critic_state(next_state)
             next_action = self.__actor.choose_action(next_state, possible_actions)
 
-            self.__actor.replace_eligibilities(state, action)
-            self.__critic.replace_eligibilities(state)
+            if self.__learn_per_episode:
+                transitions.append((state, critic_state, action, reward, next_state, next_critic_state))
+            else:
+                self.__learn(state, critic_state, action, reward, next_state, next_critic_state)
 
-            td_error = self.__critic.td_error(reward, next_state, state)
+            state, critic_state, action = next_state, next_critic_state, next_action
 
-            self.__critic.update(reward, next_state, state)
-            self.__actor.update(td_error)
+        if self.__learn_per_episode:
+            self.__learn_episode(transitions)
 
-            state, action = next_state, next_action
+    def __run_vectorized_episodes(self, episodes: int) -> None:
+        """
+        Plays the episodes on all boards of the vectorized world at once.
+        Each finished episode is learned from in one pass, with fresh eligibilities.
+        Episodes still being played, or finished beyond the requested number, are kept for the next call.
+        """
+        requires_state_vector = self.__critic.requires_state_vector()
+        if self.__board_transitions is None:
+            states, possible_actions = self.__vectorized_world.reset()
+            self.__board_transitions = [[] for _ in states]
+        else:
+            states, possible_actions = self.__vectorized_world.get_observations()
+        critic_states = self.__vectorized_world.get_state_vectors() if requires_state_vector else states
+        completed_episodes = 0
+
+        def complete_episode(board: int, pegs_remaining: int) -> None:
+            print('Episode:', self.__trained_episodes + completed_episodes)
+            self.__peg_history.append(pegs_remaining)
+            self.__reset_eligibilities()
+            self.__learn_episode(self.__board_transitions[board])
+            self.__board_transitions[board] = []
+
+        while self.__finished_boards and completed_episodes < episodes:
+            completed_episodes += 1
+            complete_episode(*self.__finished_boards.pop(0))
+
+        while completed_episodes < episodes:
+            actions = [self.__actor.choose_action(state, legal_actions) for state, legal_actions in zip(states, possible_actions)]
+            next_states, rewards, is_final_state = self.__vectorized_world.step(actions)
+            pegs_remaining = self.__vectorized_world.get_pegs_remaining()
+            next_critic_states = self.__vectorized_world.get_next_state_vectors() if requires_state_vector else next_states
+
+            transitions = zip(states, critic_states, actions, rewards.tolist(), next_states, next_critic_states)
+            for board, transition in enumerate(transitions):
+                self.__board_transitions[board].append(transition)
+                if is_final_state[board]:
+                    if completed_episodes < episodes:
+                        completed_episodes += 1
+                        complete_episode(board, int(pegs_remaining[board]))
+                    else:
+                        self.__finished_boards.append((board, int(pegs_remaining[board])))
+
+            states, possible_actions = self.__vectorized_world.get_observations()
+            critic_states = self.__vectorized_world.get_state_vectors() if requires_state_vector else states
+
+    def __run_distributed_episodes(self, episodes: int) -> None:
+        """
+        Learns from episodes played by rollout worker processes, which act with a policy
+        snapshot that is published again every policy_lag learned episodes.
+        Episodes played beyond the requested number are kept for the next call.
+        """
+        actions = BoardGeometry.get(self.config.board_type, self.config.size).actions
+        action_count = self.__simulated_world.get_action_count()
+        pending = self.__pending_episodes
+        workers = None
+        completed_episodes = 0
+        try:
+            while completed_episodes < episodes:
+                if not pending:
+                    if workers is None:
+                        # Only started once the episodes kept from the previous call are learned from
+                        states, policy, epsilon = self.__actor.get_policy()
+                        workers = RolloutWorkers(self.config, action_count, max(4096, 2 * len(states)), random.getrandbits(31))
+                        workers.publish(states, policy, epsilon)
+                    pending.extend(workers.collect())
+                episode = pending.popleft()
+                completed_episodes += 1
+                print('Episode:', self.__trained_episodes + completed_episodes)
+                self.__peg_history.append(int(episode['pegs'][-1]))
+
+                states, next_states = episode['state'].tolist(), episode['next_state'].tolist()
+                self.__reset_eligibilities()
+                self.__learn_episode([
+                    (state, state, actions[action_id], reward, next_state, next_state)
+                    for state, action_id, reward, next_state in zip(states, episode['action'].tolist(), episode['reward'].tolist(), next_states)
+                ])
+
+                if workers is not None and completed_episodes % self.config.policy_lag == 0:
+                    states, policy, epsilon = self.__actor.get_policy()
+                    if len(states) > workers.policy_capacity:
+                        # Restarts the workers with room for twice the states; their finished episodes are kept
+                        pending.extend(workers.close())
+                        workers = RolloutWorkers(self.config, action_count, 2 * len(states), random.getrandbits(31))
+                    workers.publish(states, policy, epsilon)
+        finally:
+            if workers is not None:
+                pending.extend(workers.close())
+
+    def train(self, episodes: Union[int, None] = None) -> None:
+        """
+        Runs training episodes, without plotting or visualization.
+        Runs config.episodes episodes by default; calling train again continues training with more episodes.
+        """
+        episodes = self.__episodes if episodes is None else episodes
+        if self.__vectorized_world is not None:
+            self.__run_vectorized_episodes(episodes)
+        elif self.config.num_workers > 0:
+            self.__run_distributed_episodes(episodes)
+        else:
+            for episode in range(episodes):
+                print('Episode:', self.__trained_episodes + episode + 1)
+                self.__run_one_episode()
+        self.__trained_episodes += episodes
+
+    def get_peg_history(self) -> List[int]:
+        """Pegs left at the end of every training episode"""
+        if self.__vectorized_world is not None or self.config.num_workers > 0:
+            return list(self.__peg_history)
+        return self.__simulated_world.get_peg_history()
 
     def run(self) -> None:
         """
         Runs all episodes with pivotal parameters.
-        Visualizes one round at the end.
+        Plots the training data and visualizes one round at the end, unless headless.
         """
-        for episode in range(self.__episodes):
-            print('Episode:', episode + 1)
-            self.__run_one_episode()
+        self.train()
 
         print('Training completed.')
+        if self.config.headless:
+            if self.__vectorized_world is None and self.config.num_workers == 0:
+                self.__simulated_world.report_cache_statistics()
+            return
+
         self.__actor.plot_training_data()
         self.__critic.plot_training_data()
-        self.__simulated_world.plot_training_data()
+        if self.__vectorized_world is not None:
+            self.__vectorized_world.plot_training_data()
+        elif self.config.num_workers > 0:
+            Visualize.plot_training_data(self.get_peg_history())
+        else:
+            self.__simulated_world.report_cache_statistics()
+            self.__simulated_world.plot_training_data()
 
-        if parameters.VISUALIZE_GAMES:
+        if self.config.visualize_games:
             print('Showing one episode with the greedy strategy.')
             self.__actor.set_epsilon(0)
             self.__run_one_episode(True)
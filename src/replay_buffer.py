@@ -0,0 +1,88 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Ring buffer of recent critic transitions in preallocated NumPy arrays
+
+    Stores (state vector, reward, next state vector, terminal state factor)
+    and overwrites the oldest transition once full. Mini-batches are sampled
+    uniformly, or proportionally to priority^alpha with importance sampling
+    weights when prioritized.
+
+    ...
+
+    Attributes
+    ----------
+    capacity : int
+        Maximum number of stored transitions
+    prioritized : bool
+        Whether to sample by priority
+
+    Methods
+    -------
+    add(state, reward, next_state, priority):
+        Stores a transition, overwriting the oldest one if the buffer is full.
+    sample(batch_size):
+        Returns (indices, states, rewards, next states, terminal state factors, weights) of a mini-batch.
+    update_priorities(indices, td_errors):
+        Sets the priorities of sampled transitions from their new TD errors.
+    """
+
+    PRIORITY_EXPONENT = 0.6  # alpha
+    IMPORTANCE_SAMPLING_EXPONENT = 0.4  # beta
+    MIN_PRIORITY = 1e-3
+
+    def __init__(self, capacity: int, state_dimension: int, prioritized: bool = False):
+        assert capacity > 0, 'capacity must be positive'
+        self.capacity = capacity
+        self.prioritized = prioritized
+
+        self.__states = np.zeros((capacity, state_dimension), dtype=np.float32)
+        self.__next_states = np.zeros((capacity, state_dimension), dtype=np.float32)
+        self.__rewards = np.zeros(capacity, dtype=np.float32)
+        self.__terminal_state_factors = np.zeros(capacity, dtype=np.float32)
+        self.__priorities = np.zeros(capacity, dtype=np.float64)
+
+        self.__next_index = 0
+        self.__size = 0
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def add(self, state: Tuple[int], reward: float, next_state: Tuple[int], priority: float = 1.0) -> None:
+        """Stores a transition, overwriting the oldest one if the buffer is full."""
+        index = self.__next_index
+        self.__states[index] = state
+        self.__next_states[index] = next_state
+        self.__rewards[index] = reward
+        self.__terminal_state_factors[index] = 1 - int(reward != 0)  # Ensures terminal state is always 0
+        self.__priorities[index] = max(abs(priority), self.MIN_PRIORITY) ** self.PRIORITY_EXPONENT
+
+        self.__next_index = (index + 1) % self.capacity
+        self.__size = min(self.__size + 1, self.capacity)
+
+    def sample(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (indices, states, rewards, next states, terminal state factors, weights) of a mini-batch."""
+        if self.prioritized:
+            probabilities = self.__priorities[:self.__size] / self.__priorities[:self.__size].sum()
+            indices = np.random.choice(self.__size, batch_size, p=probabilities)
+            weights = (self.__size * probabilities[indices]) ** -self.IMPORTANCE_SAMPLING_EXPONENT
+            weights = (weights / weights.max()).astype(np.float32)
+        else:
+            indices = np.random.randint(self.__size, size=batch_size)
+            weights = np.ones(batch_size, dtype=np.float32)
+        return (
+            indices,
+            self.__states[indices],
+            self.__rewards[indices],
+            self.__next_states[indices],
+            self.__terminal_state_factors[indices],
+            weights,
+        )
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        """Sets the priorities of sampled transitions from their new TD errors."""
+        self.__priorities[indices] = np.maximum(np.abs(td_errors), self.MIN_PRIORITY) ** self.PRIORITY_EXPONENT
@@ -1,59 +1,135 @@
-from typing import Tuple, Union
+from typing import Dict, List, Tuple, Union
 
-import parameters
+from bit_board import BitBoard
+from board_geometry import BoardGeometry
+from config import Config
 from data_classes import Action, Shape
 from hexagonal_board import Diamond, Triangle
+from legal_action_cache import LegalActionCache
+from symmetry import BoardSymmetries
 from visualize import Visualize
 
 
 class SimulatedWorld:
 
-    def __init__(self):
-        self.__board_type = parameters.BOARD_TYPE
-        if parameters.BOARD_TYPE == Shape.Diamond:
-            self.__game_board = Diamond(parameters.BOARD_TYPE, parameters.SIZE, parameters.HOLES)
-            Visualize.initialize_board(self.__game_board.get_board(), self.__game_board._edges, self.__board_type)
+    def __init__(self, config: Config):
+        self.__config = config
+        self.__board_type = config.board_type
+        self.__geometry = BoardGeometry.get(config.board_type, config.size)
+        self.__visualize = Visualize(config.frame_delay)
+        if config.use_bitboard:
+            self.__game_board = BitBoard(config.board_type, config.size, config.holes, self.__visualize)
+        elif config.board_type == Shape.Diamond:
+            self.__game_board = Diamond(config.board_type, config.size, config.holes, self.__visualize)
         else:
-            self.__game_board = Triangle(parameters.BOARD_TYPE, parameters.SIZE, parameters.HOLES)
-            Visualize.initialize_board(self.__game_board.get_board(), self.__game_board._edges, self.__board_type)
+            self.__game_board = Triangle(config.board_type, config.size, config.holes, self.__visualize)
+        self.__visualize.initialize_board(self.__game_board.get_board(), self.__game_board._edges, self.__board_type)
         self.__peg_history = []
-        self.__memoized_legal_actions = {}
+        self.__memoized_legal_actions = LegalActionCache(config.legal_action_cache_policy, config.legal_action_cache_size)
+        self.__move_generations = 0  # Total number of legal-move scans
+        self.__step_move_generations = 0  # Legal-move scans during the last step
+        self.__zobrist_debug = config.zobrist_debug
+        self.__seen_states: Dict[int, Tuple[int]] = {}  # Only used to detect hash collisions in debug mode
+
+        # Symmetric positions share one canonical state key, legal actions are given in the canonical frame
+        self.__symmetries = BoardSymmetries.get(config.board_type, config.size) if config.canonicalize_states else None
+        self.__symmetry = 0  # Maps the current board to its canonical frame
+        if self.__symmetries is not None:
+            initial_pegs = [cell for cell, value in enumerate(self.__game_board.get_cell_values()) if value == 1]
+            self.__initial_symmetric_hashes = self.__symmetries.hashes(initial_pegs)
+            self.__symmetric_hashes = list(self.__initial_symmetric_hashes)
         print('Initial board:')
         print(self.__game_board)
 
-    def __is_final_state(self) -> bool:
-        return self.__game_board.game_over()
-
-    def __calculate_reward(self) -> int:
+    def __calculate_reward(self, is_final_state: bool) -> int:
         if self.__game_board.pegs_remaining() == 1:
-            return parameters.WINNING_REWARD
-        elif self.__game_board.game_over():
-            return parameters.LOSING_REWARD
+            return self.__config.winning_reward
+        elif is_final_state:
+            return self.__config.losing_reward
+        else:
+            return self.__config.step_reward
+
+    def __get_state_key(self) -> int:
+        if self.__symmetries is not None:
+            state_key, self.__symmetry = self.__symmetries.canonicalize(self.__symmetric_hashes)
         else:
-            return parameters.STEP_REWARD
+            state_key = self.__game_board.get_state_key()
+        if self.__zobrist_debug:
+            cell_values = self.get_state_vector()
+            seen_cell_values = self.__seen_states.setdefault(state_key, cell_values)
+            assert seen_cell_values == cell_values, f'Zobrist hash collision for key {state_key}'
+        return state_key
 
-    def __grid_to_vector(self) -> Tuple[bool]:
-        return tuple(filter(lambda cell: bool(cell), self.__game_board.get_board().flatten()))
+    def get_state_vector(self) -> Tuple[int]:
+        """Playable cells of the current board in row-major order (1 = peg, 2 = empty), e.g. as NN critic input"""
+        cell_values = self.__game_board.get_cell_values()
+        if self.__symmetries is not None:
+            return self.__symmetries.to_canonical_vector(cell_values, self.__symmetry)
+        return cell_values
 
-    def step(self, action: Union[Action, None], visualize: bool) -> Tuple[Tuple[int], int, bool, Tuple[Action]]:
+    def step(self, action: Union[Action, None], visualize: bool) -> Tuple[int, int, bool, Tuple[Action]]:
+        """
+        Performs the action and returns (next state key, reward, final state flag, legal actions).
+        States are identified by the board's zobrist hash, or by the canonical key of the board
+        when canonicalize_states is set, in which case actions are given in the canonical frame.
+        The legal actions are generated at most once per step and reused for the final state
+        flag and the reward.
+        """
         assert action is not None, 'No actions found. Cannot play game.'
+        self.__step_move_generations = 0
+        if self.__symmetries is not None:
+            action = self.__symmetries.from_canonical_action(action, self.__symmetry)
+            self.__symmetries.update_hashes(self.__symmetric_hashes, action)
         self.__game_board.make_move(action, visualize)
-        grid_to_vector = self.__grid_to_vector()
-        return grid_to_vector, self.__calculate_reward(), self.__is_final_state(), self.__memoize_legal_actions(grid_to_vector)
+        state_key = self.__get_state_key()
+        legal_actions = self.__memoize_legal_actions(state_key)
+        is_final_state = len(legal_actions) < 1
+        return state_key, self.__calculate_reward(is_final_state), is_final_state, legal_actions
 
-    def reset(self) -> Tuple[Tuple[int], Tuple[Action]]:
+    def reset(self) -> Tuple[int, Tuple[Action]]:
         self.__peg_history.append(self.__game_board.pegs_remaining())  # Used for plotting
         self.__game_board.reset_game()
-        return self.__grid_to_vector(), self.__game_board.get_all_legal_actions()
+        if self.__symmetries is not None:
+            self.__symmetric_hashes = list(self.__initial_symmetric_hashes)
+        return self.__get_state_key(), self.__generate_legal_actions()
+
+    def get_action_count(self) -> int:
+        """Number of actions in the board's action catalogue, i.e. one more than the largest action id"""
+        return len(self.__geometry.actions)
+
+    def get_step_move_generations(self) -> int:
+        """Number of legal-move scans performed by the last step (0 on a memoized state, otherwise 1)"""
+        return self.__step_move_generations
+
+    def get_move_generations(self) -> int:
+        """Total number of legal-move scans performed by this world"""
+        return self.__move_generations
+
+    def report_cache_statistics(self) -> None:
+        print(self.__memoized_legal_actions.report())
+
+    def get_pegs_remaining(self) -> int:
+        """Pegs left on the current board"""
+        return self.__game_board.pegs_remaining()
+
+    def get_peg_history(self) -> List[int]:
+        """Pegs left at the end of every episode, once the current episode is finished"""
+        return self.__peg_history[1:] + [self.__game_board.pegs_remaining()]
 
     def plot_training_data(self) -> None:
-        self.__peg_history.append(self.__game_board.pegs_remaining())
-        Visualize.plot_training_data(self.__peg_history[1:])
-
-    def __memoize_legal_actions(self, grid_to_vector: Tuple[bool]) -> Tuple[Action]:
-        if grid_to_vector not in self.__memoized_legal_actions:
-            all_legal_actions = self.__game_board.get_all_legal_actions()
-            self.__memoized_legal_actions[grid_to_vector] = all_legal_actions
-            return all_legal_actions
-        else:
-            return self.__memoized_legal_actions[grid_to_vector]
+        Visualize.plot_training_data(self.get_peg_history())
+
+    def __generate_legal_actions(self) -> Tuple[Action]:
+        self.__move_generations += 1
+        self.__step_move_generations += 1
+        legal_actions = self.__game_board.get_all_legal_actions()
+        if self.__symmetries is not None:
+            return self.__symmetries.to_canonical_actions(legal_actions, self.__symmetry)
+        return legal_actions
+
+    def __memoize_legal_actions(self, state_key: int) -> Tuple[Action]:
+        all_legal_actions = self.__memoized_legal_actions.get(state_key)
+        if all_legal_actions is None:
+            all_legal_actions = self.__generate_legal_actions()
+            self.__memoized_legal_actions.put(state_key, all_legal_actions)
+        return all_legal_actions
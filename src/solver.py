@@ -0,0 +1,186 @@
+import json
+import os
+from typing import Dict, Iterable, List, Set, Tuple
+
+from board_geometry import BoardGeometry
+from data_classes import Action, Shape
+from symmetry import BoardSymmetries
+
+SOLUTION_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'solutions.json')
+
+
+class Solution:
+    """
+    Exact result of solving one board configuration
+
+    ...
+
+    Attributes
+    ----------
+    solvable : bool
+        Whether the game can be finished with one peg left
+    min_pegs : int
+        Fewest pegs left in any final state reachable from the start
+    moves : Tuple[Action]
+        A move sequence from the start to a final state with min_pegs pegs
+    """
+
+    def __init__(self, min_pegs: int, moves: Tuple[Action]):
+        self.solvable = min_pegs == 1
+        self.min_pegs = min_pegs
+        self.moves = moves
+
+    def __repr__(self) -> str:
+        moves = ', '.join(f'{action.start_coordinates}->{action.landing_coordinates}' for action in self.moves)
+        return f'Solution(solvable={self.solvable}, min_pegs={self.min_pegs}, moves=[{moves}])'
+
+
+class Solver:
+    """
+    Exact peg solitaire solver
+
+    Depth-first search over peg bitmasks with the move rules of BoardGeometry,
+    which are the same as HexagonalBoard's. A transposition table stores the
+    fewest pegs reachable from every visited state, so each state is expanded
+    once. With use_symmetries the table is keyed by the smallest bitmask among
+    the state's symmetric images, computed with per-byte lookup tables. The
+    search stops as soon as a one-peg finish is found.
+
+    ...
+
+    Attributes
+    ----------
+    expanded_states : int
+        Number of states expanded by the last search
+
+    Methods
+    -------
+    solve(holes):
+        Returns the Solution for the board with the given start holes.
+    """
+
+    def __init__(self, board_type: Shape, size: int, use_symmetries: bool = True, cache_file: str = SOLUTION_CACHE_FILE):
+        self.__board_type = board_type
+        self.__size = size
+        self.__geometry = BoardGeometry.get(board_type, size)
+        self.__cache_file = cache_file
+        self.__jumps = tuple(
+            ((1 << start) | (1 << over), 1 << landing, (1 << start) | (1 << over) | (1 << landing))
+            for start, over, landing, _ in self.__geometry.jumps
+        )
+
+        # table[symmetry][byte][value] is the image of the pegs value << (8 * byte) under the symmetry
+        cell_count = len(self.__geometry.cells)
+        self.__byte_count = (cell_count + 7) // 8
+        self.__symmetry_tables: List[List[List[int]]] = []
+        if use_symmetries:
+            for permutation in BoardSymmetries.get(board_type, size).cell_permutations[1:]:
+                self.__symmetry_tables.append([
+                    [
+                        sum(1 << permutation[8 * byte + bit] for bit in range(8) if value >> bit & 1 and 8 * byte + bit < cell_count)
+                        for value in range(256)
+                    ]
+                    for byte in range(self.__byte_count)
+                ])
+
+        self.__table: Dict[int, int] = {}
+        self.expanded_states = 0
+
+    def __canonical(self, pegs: int) -> int:
+        """Smallest bitmask among the images of pegs under the board's symmetries"""
+        canonical = pegs
+        for table in self.__symmetry_tables:
+            image = 0
+            for byte, byte_table in enumerate(table):
+                image |= byte_table[pegs >> (8 * byte) & 0xFF]
+            if image < canonical:
+                canonical = image
+        return canonical
+
+    def __search(self, pegs: int, peg_count: int) -> int:
+        """Fewest pegs reachable from pegs, stored in the transposition table"""
+        key = self.__canonical(pegs)
+        min_pegs = self.__table.get(key)
+        if min_pegs is not None:
+            return min_pegs
+
+        self.expanded_states += 1
+        min_pegs = peg_count
+        for from_over_mask, to_mask, jump_mask in self.__jumps:
+            if pegs & from_over_mask == from_over_mask and not pegs & to_mask:
+                reachable = self.__search(pegs ^ jump_mask, peg_count - 1)
+                if reachable < min_pegs:
+                    min_pegs = reachable
+                    if min_pegs == 1:
+                        break
+        self.__table[key] = min_pegs
+        return min_pegs
+
+    def __solution_moves(self, pegs: int, min_pegs: int) -> Tuple[Action]:
+        """Follows moves to states that can still reach min_pegs, using the filled transposition table"""
+        moves = []
+        while True:
+            for (from_over_mask, to_mask, jump_mask), action in zip(self.__jumps, self.__geometry.actions):
+                if pegs & from_over_mask == from_over_mask and not pegs & to_mask:
+                    if self.__table.get(self.__canonical(pegs ^ jump_mask)) == min_pegs:
+                        moves.append(action)
+                        pegs ^= jump_mask
+                        break
+            else:
+                return tuple(moves)
+
+    def __initial_pegs(self, holes: Iterable[Tuple[int, int]]) -> int:
+        pegs = (1 << len(self.__geometry.cells)) - 1
+        for hole in holes:
+            if hole in self.__geometry.cell_index:
+                pegs &= ~(1 << self.__geometry.cell_index[hole])
+        return pegs
+
+    def __cache_key(self, holes: Iterable[Tuple[int, int]]) -> str:
+        holes = sorted(hole for hole in holes if hole in self.__geometry.cell_index)
+        return f'{self.__board_type.name}-{self.__size}-{holes}'
+
+    def __load_cache(self) -> Dict[str, dict]:
+        if self.__cache_file is None or not os.path.exists(self.__cache_file):
+            return {}
+        with open(self.__cache_file) as file:
+            return json.load(file)
+
+    def __to_actions(self, moves: List[List[int]]) -> Tuple[Action]:
+        actions = {(action.start_coordinates, action.direction_vector): action for action in self.__geometry.actions}
+        return tuple(actions[(tuple(start), tuple(direction))] for start, direction in moves)
+
+    def solve(self, holes: Set[Tuple[int, int]]) -> Solution:
+        """Returns the Solution for the board with the given start holes."""
+        cache = self.__load_cache()
+        key = self.__cache_key(holes)
+        if key in cache:
+            return Solution(cache[key]['min_pegs'], self.__to_actions(cache[key]['moves']))
+
+        pegs = self.__initial_pegs(holes)
+        self.__table = {}
+        self.expanded_states = 0
+        min_pegs = self.__search(pegs, bin(pegs).count('1'))
+        solution = Solution(min_pegs, self.__solution_moves(pegs, min_pegs))
+        self.__table = {}
+
+        if self.__cache_file is not None:
+            cache[key] = {
+                'solvable': solution.solvable,
+                'min_pegs': solution.min_pegs,
+                'moves': [[action.start_coordinates, action.direction_vector] for action in solution.moves],
+            }
+            os.makedirs(os.path.dirname(self.__cache_file) or '.', exist_ok=True)
+            with open(self.__cache_file, 'w') as file:
+                json.dump(cache, file, indent=2)
+        return solution
+
+
+if __name__ == '__main__':
+    import parameters
+    from config import Config
+
+    config = Config.from_module(parameters)
+    solver = Solver(config.board_type, config.size)
+    print(solver.solve(config.holes))
+    print('Expanded states:', solver.expanded_states)
@@ -0,0 +1,177 @@
+import os
+from typing import Iterable, Set, Tuple
+
+import numpy as np
+
+from board_geometry import BoardGeometry
+from data_classes import Shape
+
+STATE_GRAPH_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'state_graphs')
+
+
+class StateGraph:
+    """
+    Every state reachable from a start position, with its transitions in CSR form
+
+    States are peg bitmasks (bit k set when cell k of the board geometry holds
+    a peg), stored sorted so a state's index is found by binary search. The
+    successors of state i are successors[offsets[i]:offsets[i + 1]], reached
+    with the actions in action_ids at the same positions, sorted by action id.
+    Each move removes one peg, so the graph is built one peg count at a time
+    with array operations over the jump table.
+
+    ...
+
+    Attributes
+    ----------
+    states : np.ndarray
+        Sorted uint64 peg bitmasks
+    offsets : np.ndarray
+        int64 CSR offsets into successors and action_ids, one more than the number of states
+    successors : np.ndarray
+        int32 index of the successor state of each transition
+    action_ids : np.ndarray
+        int16 id of the action of each transition
+    terminal : np.ndarray
+        True for states without legal actions
+    winning : np.ndarray
+        True for states with one peg left
+
+    Methods
+    -------
+    build(board_type, size, holes, max_states):
+        Enumerates every state reachable from the start position.
+    load(directory, mmap_mode):
+        Loads a saved graph, memory mapped by default.
+    load_or_build(board_type, size, holes):
+        Loads the saved graph of the board, building and saving it first if needed.
+    save(directory):
+        Saves the graph as one .npy file per array.
+    index(pegs):
+        Returns the index of a state.
+    """
+
+    ARRAYS = ('states', 'offsets', 'successors', 'action_ids', 'terminal', 'winning')
+
+    def __init__(
+        self,
+        states: np.ndarray,
+        offsets: np.ndarray,
+        successors: np.ndarray,
+        action_ids: np.ndarray,
+        terminal: np.ndarray,
+        winning: np.ndarray,
+    ):
+        self.states = states
+        self.offsets = offsets
+        self.successors = successors
+        self.action_ids = action_ids
+        self.terminal = terminal
+        self.winning = winning
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    @staticmethod
+    def get_directory(board_type: Shape, size: int, holes: Iterable[Tuple[int, int]]) -> str:
+        """Directory of the saved graph of the board"""
+        holes = '_'.join(f'{row}.{column}' for row, column in sorted(holes)) or 'none'
+        return os.path.join(STATE_GRAPH_DIRECTORY, f'{board_type.name}-{size}-{holes}')
+
+    @classmethod
+    def build(cls, board_type: Shape, size: int, holes: Set[Tuple[int, int]], max_states: int = 10_000_000) -> 'StateGraph':
+        """
+        Enumerates every state reachable from the start position.
+        Stops with an assertion error once more than max_states states are found, as large boards do not fit in memory.
+        """
+        geometry = BoardGeometry.get(board_type, size)
+        assert len(geometry.cells) <= 64, 'States are stored as 64-bit masks'
+        assert len(geometry.actions) <= np.iinfo(np.int16).max, 'Action ids are stored as int16'
+
+        jumps = np.array([jump[:3] for jump in geometry.jumps], dtype=np.uint64).reshape(-1, 3)
+        one = np.uint64(1)
+        from_over_masks = (one << jumps[:, 0]) | (one << jumps[:, 1])
+        to_masks = one << jumps[:, 2]
+        jump_masks = from_over_masks | to_masks
+
+        start = (1 << len(geometry.cells)) - 1
+        for hole in holes:
+            if hole in geometry.cell_index:
+                start &= ~(1 << geometry.cell_index[hole])
+
+        # Breadth-first, one peg count per level; levels are disjoint since every move removes a peg
+        levels, edges = [np.array([start], dtype=np.uint64)], []
+        while len(levels[-1]):
+            frontier = levels[-1]
+            parents, action_ids, children = [], [], []
+            for action_id in range(len(jump_masks)):
+                is_legal = (frontier & from_over_masks[action_id] == from_over_masks[action_id]) & (frontier & to_masks[action_id] == 0)
+                legal = np.flatnonzero(is_legal)
+                parents.append(frontier[legal])
+                action_ids.append(np.full(len(legal), action_id, dtype=np.int16))
+                children.append(frontier[legal] ^ jump_masks[action_id])
+            edges.append((np.concatenate(parents), np.concatenate(action_ids), np.concatenate(children)))
+            levels.append(np.unique(np.concatenate(children)))
+            assert sum(len(level) for level in levels) <= max_states, f'More than {max_states} reachable states'
+
+        states = np.sort(np.concatenate(levels))
+        parents, action_ids, children = (np.concatenate(arrays) for arrays in zip(*edges))
+        parents = np.searchsorted(states, parents)
+        successors = np.searchsorted(states, children)
+        assert len(states) <= np.iinfo(np.int32).max, 'Successors are stored as int32'
+
+        order = np.lexsort((action_ids, parents))
+        offsets = np.zeros(len(states) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parents, minlength=len(states)), out=offsets[1:])
+
+        terminal = offsets[1:] == offsets[:-1]
+        peg_counts = np.zeros(len(states), dtype=np.int64)
+        for cell in range(len(geometry.cells)):
+            peg_counts += (states >> np.uint64(cell) & one).astype(np.int64)
+
+        return cls(
+            states,
+            offsets,
+            successors[order].astype(np.int32),
+            action_ids[order],
+            terminal,
+            peg_counts == 1,
+        )
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: str = 'r') -> 'StateGraph':
+        """Loads a saved graph, memory mapped by default."""
+        return cls(*(np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode) for name in cls.ARRAYS))
+
+    @classmethod
+    def load_or_build(cls, board_type: Shape, size: int, holes: Set[Tuple[int, int]]) -> 'StateGraph':
+        """Loads the saved graph of the board, building and saving it first if needed."""
+        directory = cls.get_directory(board_type, size, holes)
+        if not all(os.path.exists(os.path.join(directory, f'{name}.npy')) for name in cls.ARRAYS):
+            cls.build(board_type, size, holes).save(directory)
+        return cls.load(directory)
+
+    def save(self, directory: str) -> None:
+        """Saves the graph as one .npy file per array."""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+
+    def index(self, pegs: int) -> int:
+        """Returns the index of a state."""
+        index = int(np.searchsorted(self.states, np.uint64(pegs)))
+        assert index < len(self.states) and int(self.states[index]) == pegs, 'State is not reachable from the start position'
+        return index
+
+
+if __name__ == '__main__':
+    import parameters
+    from config import Config
+
+    config = Config.from_module(parameters)
+    state_graph = StateGraph.build(config.board_type, config.size, config.holes)
+    directory = StateGraph.get_directory(config.board_type, config.size, config.holes)
+    state_graph.save(directory)
+    print(f'{len(state_graph)} states, {len(state_graph.successors)} transitions, '
+          f'{int(state_graph.terminal.sum())} final states, {int(state_graph.winning.sum())} winning states')
+    print('Saved to', directory)
@@ -0,0 +1,194 @@
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import pickle
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from config import Config
+from sweep import expand_grid, get_available_cores, parse_override, save_summary, seed_everything
+
+SUCCESSIVE_HALVING_RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'successive_halving.csv')
+CHECKPOINT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'successive_halving')
+
+
+def train_trial(
+    parameter_file: str,
+    overrides: Dict[str, Any],
+    seed: int,
+    episodes: int,
+    checkpoint: Union[bytes, str, None],
+    window: int,
+) -> Tuple[float, List[int], Union[bytes, None], float]:
+    """
+    Trains one trial for the given number of additional episodes in the current process.
+    The trial starts from scratch when checkpoint is None, and otherwise resumes from the pickled
+    learner and random number generator states, given either as bytes or as the path of a file.
+    A path is overwritten with the new state and None is returned in its place, bytes are returned as new bytes.
+    Returns (rolling mean of the pegs left over the last window episodes, peg history, checkpoint, wall time).
+    """
+    from reinforcement_learner import ReinforcementLearner
+
+    config = Config.load(parameter_file, {'HEADLESS': True, **overrides})
+    start = time.perf_counter()
+    if checkpoint is None:
+        seed_everything(seed, config)
+        with contextlib.redirect_stdout(io.StringIO()):
+            learner = ReinforcementLearner(config)
+    else:
+        if isinstance(checkpoint, str):
+            with open(checkpoint, 'rb') as file:
+                learner, python_state, numpy_state = pickle.load(file)
+        else:
+            learner, python_state, numpy_state = pickle.loads(checkpoint)
+        seed_everything(seed, config)
+        random.setstate(python_state)
+        np.random.set_state(numpy_state)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        learner.train(episodes)
+    wall_time = time.perf_counter() - start
+
+    state = pickle.dumps((learner, random.getstate(), np.random.get_state()), protocol=pickle.HIGHEST_PROTOCOL)
+    if isinstance(checkpoint, str):
+        with open(checkpoint, 'wb') as file:
+            file.write(state)
+        state = None
+
+    peg_history = learner.get_peg_history()
+    return statistics.mean(peg_history[-window:]), peg_history, state, wall_time
+
+
+def run_successive_halving(
+    parameter_files: Sequence[str],
+    grid: Dict[str, Sequence[Any]],
+    seeds: Sequence[int],
+    min_episodes: int,
+    max_episodes: int,
+    reduction_factor: int = 3,
+    window: int = 50,
+    workers: Union[int, None] = None,
+    checkpoint_directory: Union[str, None] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Successive halving over every combination of parameter file, grid overrides and seed.
+    All trials are trained for min_episodes, then only the best 1 / reduction_factor of them by rolling
+    pegs left continue, each rung multiplying the episode budget by reduction_factor up to max_episodes.
+    Survivors resume from their checkpoint instead of starting over; checkpoints are kept in memory and
+    passed to the worker processes, or saved to checkpoint_directory if given, e.g. when they are large.
+    Returns one summary row per trial and rung, in rung order.
+    """
+    assert reduction_factor >= 2, 'reduction_factor must be at least 2'
+    assert 0 < min_episodes <= max_episodes, 'min_episodes must be positive and at most max_episodes'
+
+    trials = expand_grid(parameter_files, grid, seeds)
+    if checkpoint_directory is not None:
+        os.makedirs(checkpoint_directory, exist_ok=True)
+    checkpoints: Dict[int, Union[bytes, str, None]] = {trial: None for trial in range(len(trials))}
+    trained_episodes = dict.fromkeys(checkpoints, 0)
+    workers = workers or get_available_cores()
+
+    rows: List[Dict[str, Any]] = []
+    survivors = list(range(len(trials)))
+    budget = min_episodes
+    for rung in itertools.count():
+        scores: Dict[int, float] = {}
+        with ProcessPoolExecutor(max_workers=min(workers, len(survivors))) as executor:
+            futures = {
+                executor.submit(
+                    train_trial,
+                    *trials[trial],
+                    budget - trained_episodes[trial],
+                    checkpoints[trial],
+                    window,
+                ): trial for trial in survivors
+            }
+            for future in as_completed(futures):
+                trial = futures[future]
+                score, peg_history, state, wall_time = future.result()
+                scores[trial] = score
+                trained_episodes[trial] = budget
+                if checkpoint_directory is None:
+                    checkpoints[trial] = state
+                elif checkpoints[trial] is None:
+                    checkpoints[trial] = os.path.join(checkpoint_directory, f'{trial}.pkl')
+                    with open(checkpoints[trial], 'wb') as file:
+                        file.write(state)
+
+                parameter_file, overrides, seed = trials[trial]
+                rows.append({
+                    'rung': rung,
+                    'parameter_file': parameter_file,
+                    'overrides': ' '.join(f'{name}={value!r}' for name, value in overrides.items()),
+                    'seed': seed,
+                    'episodes': budget,
+                    'rolling_pegs': score,
+                    'win_rate': sum(pegs == 1 for pegs in peg_history[-window:]) / len(peg_history[-window:]),
+                    'wall_time': wall_time,
+                })
+        print(f'Rung {rung}: {len(survivors)} trials trained to {budget} episodes')
+
+        if budget >= max_episodes or len(survivors) == 1:
+            break
+        survivors = sorted(survivors, key=lambda trial: scores[trial])[:max(1, len(survivors) // reduction_factor)]
+        for trial in set(checkpoints) - set(survivors):
+            checkpoints[trial] = None  # Frees the memory of eliminated trials
+        budget = min(budget * reduction_factor, max_episodes)
+
+    rows.sort(key=lambda row: (row['rung'], row['rolling_pegs']))
+    return rows
+
+
+def format_summary(rows: List[Dict[str, Any]]) -> str:
+    """One line per trial and rung, best first within each rung"""
+    lines = [f'{"rung":>4} {"parameter file":<30} {"overrides":<40} {"seed":>6} {"episodes":>8} {"pegs":>6} {"win rate":>9} {"wall time":>10}']
+    for row in rows:
+        lines.append(
+            f'{row["rung"]:>4} {row["parameter_file"]:<30} {row["overrides"]:<40} {row["seed"]:>6} {row["episodes"]:>8} '
+            f'{row["rolling_pegs"]:>6.2f} {row["win_rate"]:>9.2f} {row["wall_time"]:>9.1f}s'
+        )
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Successive halving over a grid of parameter overrides and seeds on a process pool.')
+    parser.add_argument('parameter_files', nargs='+', help='Parameter file names, e.g. D2_table_critic_triangle_5')
+    parser.add_argument('--set', dest='overrides', action='append', default=[], type=parse_override,
+                        help="Parameter override grid, e.g. --set ACTOR_EPSILON_DECAY=0.99,0.995 --set ACTOR_LEARNING_RATE=0.1,0.01")
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0])
+    parser.add_argument('--min-episodes', type=int, default=50, help='Episode budget of the first rung')
+    parser.add_argument('--max-episodes', type=int, default=None, help='Episode budget of the last rung; defaults to EPISODES')
+    parser.add_argument('--reduction-factor', type=int, default=3, help='Keeps the best 1 / reduction factor trials per rung')
+    parser.add_argument('--window', type=int, default=50, help='Number of last episodes in the rolling pegs left')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes; defaults to the available cores')
+    parser.add_argument('--on-disk', action='store_true', help=f'Keeps checkpoints in {CHECKPOINT_DIRECTORY} instead of in memory')
+    arguments = parser.parse_args()
+
+    if arguments.max_episodes is None:
+        arguments.max_episodes = Config.load(arguments.parameter_files[0]).episodes
+
+    grid = {name: values for override in arguments.overrides for name, values in override.items()}
+    start = time.perf_counter()
+    rows = run_successive_halving(
+        arguments.parameter_files,
+        grid,
+        arguments.seeds,
+        arguments.min_episodes,
+        arguments.max_episodes,
+        arguments.reduction_factor,
+        arguments.window,
+        arguments.workers,
+        CHECKPOINT_DIRECTORY if arguments.on_disk else None,
+    )
+    print(format_summary(rows))
+    save_summary(rows, SUCCESSIVE_HALVING_RESULTS_FILE)
+    best = min((row for row in rows if row['rung'] == rows[-1]['rung']), key=lambda row: row['rolling_pegs'])
+    print(f'Best: {best["parameter_file"]} {best["overrides"]} seed {best["seed"]} with {best["rolling_pegs"]:.2f} pegs left')
+    print(f'{len(rows)} trial rungs in {time.perf_counter() - start:.1f}s, saved to {SUCCESSIVE_HALVING_RESULTS_FILE}')
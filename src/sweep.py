@@ -0,0 +1,158 @@
+import argparse
+import ast
+import contextlib
+import csv
+import io
+import itertools
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from config import Config
+
+SWEEP_RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'sweep.csv')
+EVALUATION_FRACTION = 0.1  # Share of the last episodes used for the final peg count and win rate
+
+# One thread per worker process, so the sweep scales with the number of processes rather than oversubscribing cores
+for _variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+    os.environ.setdefault(_variable, '1')
+
+
+def seed_everything(seed: int, config: Config) -> None:
+    """Seeds every random number generator used in training, so runs are deterministic per seed"""
+    import random
+
+    import numpy as np
+
+    random.seed(seed)
+    np.random.seed(seed)
+    if not config.use_table_critic and config.critic_nn_backend == 'tensorflow':
+        import tensorflow as tf
+
+        tf.random.set_seed(seed)
+
+
+def get_available_cores() -> int:
+    """Cores this process may run on; sched_getaffinity is only available on some platforms, e.g. Linux"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def expand_grid(
+    parameter_files: Sequence[str],
+    grid: Dict[str, Sequence[Any]],
+    seeds: Sequence[int],
+) -> List[Tuple[str, Dict[str, Any], int]]:
+    """Every combination of parameter file, grid overrides and seed, as (parameter file, overrides, seed)"""
+    names = list(grid)
+    return [
+        (parameter_file, dict(zip(names, values)), seed)
+        for parameter_file in parameter_files
+        for values in itertools.product(*(grid[name] for name in names))
+        for seed in seeds
+    ]
+
+
+def run_configuration(parameter_file: str, overrides: Dict[str, Any], seed: int) -> Dict[str, Any]:
+    """Trains one learner in the current process and returns its summary row"""
+    config = Config.load(parameter_file, {'HEADLESS': True, **overrides})
+    seed_everything(seed, config)
+
+    from reinforcement_learner import ReinforcementLearner
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        learner = ReinforcementLearner(config)
+        learner.train()
+    wall_time = time.perf_counter() - start
+
+    peg_history = learner.get_peg_history()
+    evaluated = peg_history[-max(1, int(len(peg_history) * EVALUATION_FRACTION)):]
+    return {
+        'parameter_file': parameter_file,
+        'overrides': ' '.join(f'{name}={value!r}' for name, value in overrides.items()),
+        'seed': seed,
+        'episodes': len(peg_history),
+        'final_pegs': statistics.mean(evaluated),
+        'win_rate': sum(pegs == 1 for pegs in evaluated) / len(evaluated),
+        'wall_time': wall_time,
+    }
+
+
+def run_sweep(
+    parameter_files: Sequence[str],
+    grid: Dict[str, Sequence[Any]],
+    seeds: Sequence[int],
+    workers: Union[int, None] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs every combination of parameter file, grid overrides and seed on a process pool
+    sized to the available cores, and returns one summary row per run in submission order.
+    """
+    runs = expand_grid(parameter_files, grid, seeds)
+    workers = workers or get_available_cores()
+
+    rows: List[Dict[str, Any]] = [None] * len(runs)  # type: ignore
+    with ProcessPoolExecutor(max_workers=min(workers, len(runs))) as executor:
+        futures = {executor.submit(run_configuration, *run): index for index, run in enumerate(runs)}
+        for future in as_completed(futures):
+            rows[futures[future]] = future.result()
+            print(f'Finished run {sum(row is not None for row in rows)}/{len(runs)}')
+    return rows
+
+
+def format_summary(rows: List[Dict[str, Any]]) -> str:
+    """One line per run, followed by the mean over seeds of every configuration"""
+    lines = [f'{"parameter file":<30} {"overrides":<40} {"seed":>6} {"final pegs":>10} {"win rate":>9} {"wall time":>10}']
+    for row in rows:
+        lines.append(
+            f'{row["parameter_file"]:<30} {row["overrides"]:<40} {row["seed"]:>6} '
+            f'{row["final_pegs"]:>10.2f} {row["win_rate"]:>9.2f} {row["wall_time"]:>9.1f}s'
+        )
+
+    lines.append('')
+    lines.append(f'{"parameter file":<30} {"overrides":<40} {"seeds":>6} {"final pegs":>10} {"win rate":>9} {"wall time":>10}')
+    for (parameter_file, overrides), group in itertools.groupby(rows, key=lambda row: (row['parameter_file'], row['overrides'])):
+        group = list(group)
+        lines.append(
+            f'{parameter_file:<30} {overrides:<40} {len(group):>6} '
+            f'{statistics.mean(row["final_pegs"] for row in group):>10.2f} '
+            f'{statistics.mean(row["win_rate"] for row in group):>9.2f} '
+            f'{statistics.mean(row["wall_time"] for row in group):>9.1f}s'
+        )
+    return '\n'.join(lines)
+
+
+def save_summary(rows: List[Dict[str, Any]], file_name: str = SWEEP_RESULTS_FILE) -> None:
+    os.makedirs(os.path.dirname(file_name), exist_ok=True)
+    with open(file_name, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_override(argument: str) -> Dict[str, List[Any]]:
+    """Parses NAME=value1,value2,... where every value is a Python literal"""
+    name, values = argument.split('=', 1)
+    parsed = ast.literal_eval(f'[{values}]')
+    return {name: parsed}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs a grid of parameter overrides and seeds on a process pool.')
+    parser.add_argument('parameter_files', nargs='+', help='Parameter file names, e.g. D2_table_critic_triangle_5')
+    parser.add_argument('--set', dest='overrides', action='append', default=[], type=parse_override,
+                        help="Parameter override grid, e.g. --set ACTOR_EPSILON_DECAY=0.99,0.995 --set EPISODES=200")
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0])
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes; defaults to the available cores')
+    arguments = parser.parse_args()
+
+    grid = {name: values for override in arguments.overrides for name, values in override.items()}
+    start = time.perf_counter()
+    rows = run_sweep(arguments.parameter_files, grid, arguments.seeds, arguments.workers)
+    print(format_summary(rows))
+    save_summary(rows)
+    print(f'{len(rows)} runs in {time.perf_counter() - start:.1f}s, saved to {SWEEP_RESULTS_FILE}')
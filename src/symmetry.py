@@ -0,0 +1,157 @@
+from itertools import product
+from typing import Dict, List, Sequence, Tuple
+
+from board_geometry import BoardGeometry
+from data_classes import Action, Shape
+
+
+class BoardSymmetries:
+    """
+    Symmetry group of a hexagonal board of a given shape and size
+
+    A symmetry is an integer linear map of the (row, column) coordinates that
+    maps the board's neighbour directions onto themselves, followed by the
+    translation that maps the board onto itself. Triangle boards have 6 such
+    symmetries and diamond boards have 4. Symmetry 0 is always the identity.
+
+    Start holes are ordinary empty cells, so two positions that are images of
+    each other have the same future whatever HOLES is, and every symmetry of
+    the board can be used regardless of the holes.
+
+    States are identified by the zobrist hash of their image under each
+    symmetry. The canonical key of a state is the smallest of these hashes,
+    and the symmetry that gives it maps the state to its canonical frame.
+
+    ...
+
+    Attributes
+    ----------
+    cell_permutations : Tuple[Tuple[int]]
+        Image of each cell index under each symmetry
+    action_permutations : Tuple[Tuple[int]]
+        Image of each action id under each symmetry
+    inverse_action_permutations : Tuple[Tuple[int]]
+        Preimage of each action id under each symmetry
+
+    Methods
+    -------
+    get(board_type, size):
+        Returns the shared symmetries of the given board.
+    hashes(pegs):
+        Returns the zobrist hash of the image of the board under every symmetry.
+    update_hashes(hashes, action):
+        Updates the hashes of every image in place after the action was performed.
+    canonicalize(hashes):
+        Returns (canonical key, symmetry to the canonical frame).
+    to_canonical_actions(actions, symmetry):
+        Maps actions to the canonical frame, sorted by id.
+    from_canonical_action(action, symmetry):
+        Maps an action in the canonical frame back to the board.
+    to_canonical_vector(cell_values, symmetry):
+        Maps a state vector to the canonical frame.
+    """
+
+    __cache: Dict[Tuple[Shape, int], 'BoardSymmetries'] = {}
+
+    def __init__(self, board_type: Shape, size: int):
+        self.__geometry = BoardGeometry.get(board_type, size)
+        self.cell_permutations = self.__build_cell_permutations()
+
+        jump_ids = {jump[:3]: action_id for action_id, jump in enumerate(self.__geometry.jumps)}
+        self.action_permutations = tuple(
+            tuple(jump_ids[(permutation[start], permutation[over], permutation[landing])]
+                  for start, over, landing, _ in self.__geometry.jumps)
+            for permutation in self.cell_permutations
+        )
+        self.inverse_action_permutations = tuple(
+            self.__invert(permutation) for permutation in self.action_permutations
+        )
+        self.__inverse_cell_permutations = tuple(
+            self.__invert(permutation) for permutation in self.cell_permutations
+        )
+
+        # The image of a jump is a jump, so an image hash is updated with the image action's hash
+        self.__zobrist_keys = tuple(
+            tuple(self.__geometry.zobrist_keys[image] for image in permutation)
+            for permutation in self.cell_permutations
+        )
+        self.__action_hashes = tuple(
+            tuple(self.__geometry.action_hashes[image] for image in permutation)
+            for permutation in self.action_permutations
+        )
+
+    @classmethod
+    def get(cls, board_type: Shape, size: int) -> 'BoardSymmetries':
+        """Returns the shared symmetries of the given board."""
+        key = (board_type, size)
+        if key not in cls.__cache:
+            cls.__cache[key] = cls(board_type, size)
+        return cls.__cache[key]
+
+    def __len__(self) -> int:
+        return len(self.cell_permutations)
+
+    @staticmethod
+    def __invert(permutation: Sequence[int]) -> Tuple[int]:
+        inverse = [0] * len(permutation)
+        for index, image in enumerate(permutation):
+            inverse[image] = index
+        return tuple(inverse)
+
+    def __build_cell_permutations(self) -> Tuple[Tuple[int]]:
+        """Tries every 2x2 matrix with entries in {-1, 0, 1}, identity first"""
+        cells = self.__geometry.cells
+        edges = set(self.__geometry.edges)
+        matrices = [((1, 0), (0, 1))] + [
+            ((a, b), (c, d))
+            for a, b, c, d in product((-1, 0, 1), repeat=4)
+            if (a, b, c, d) != (1, 0, 0, 1) and a * d - b * c in (-1, 1)
+        ]
+
+        permutations = []
+        for (a, b), (c, d) in matrices:
+            if {(a * i + b * j, c * i + d * j) for i, j in edges} != edges:
+                continue
+            images = [(a * i + b * j, c * i + d * j) for i, j in cells]
+            row_offset = min(i for i, _ in cells) - min(i for i, _ in images)
+            column_offset = min(j for _, j in cells) - min(j for _, j in images)
+            images = [(i + row_offset, j + column_offset) for i, j in images]
+            if all(image in self.__geometry.cell_index for image in images):
+                permutations.append(tuple(self.__geometry.cell_index[image] for image in images))
+        return tuple(permutations)
+
+    def hashes(self, pegs: Sequence[int]) -> List[int]:
+        """Returns the zobrist hash of the image of the board under every symmetry."""
+        hashes = []
+        for keys in self.__zobrist_keys:
+            state_hash = 0
+            for cell in pegs:
+                state_hash ^= keys[cell]
+            hashes.append(state_hash)
+        return hashes
+
+    def update_hashes(self, hashes: List[int], action: Action) -> None:
+        """Updates the hashes of every image in place after the action was performed."""
+        for symmetry, action_hashes in enumerate(self.__action_hashes):
+            hashes[symmetry] ^= action_hashes[action.id]
+
+    @staticmethod
+    def canonicalize(hashes: Sequence[int]) -> Tuple[int, int]:
+        """Returns (canonical key, symmetry to the canonical frame)."""
+        symmetry = min(range(len(hashes)), key=hashes.__getitem__)
+        return hashes[symmetry], symmetry
+
+    def to_canonical_actions(self, actions: Sequence[Action], symmetry: int) -> Tuple[Action]:
+        """Maps actions to the canonical frame, sorted by id."""
+        if symmetry == 0:
+            return tuple(actions)
+        permutation = self.action_permutations[symmetry]
+        return tuple(self.__geometry.actions[action_id] for action_id in sorted(permutation[action.id] for action in actions))
+
+    def from_canonical_action(self, action: Action, symmetry: int) -> Action:
+        """Maps an action in the canonical frame back to the board."""
+        return self.__geometry.actions[self.inverse_action_permutations[symmetry][action.id]]
+
+    def to_canonical_vector(self, cell_values: Sequence[int], symmetry: int) -> Tuple[int]:
+        """Maps a state vector to the canonical frame."""
+        return tuple(cell_values[cell] for cell in self.__inverse_cell_permutations[symmetry])
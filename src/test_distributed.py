@@ -0,0 +1,127 @@
+import multiprocessing
+import unittest
+
+import numpy as np
+
+from distributed import TRANSITION_DTYPE, SharedPolicy, TransitionRing
+
+
+def make_transitions(first: int, count: int) -> np.ndarray:
+    """Transitions numbered first, first + 1, ... in every field"""
+    transitions = np.zeros(count, dtype=TRANSITION_DTYPE)
+    numbers = np.arange(first, first + count)
+    transitions['state'] = numbers
+    transitions['next_state'] = numbers + 1
+    transitions['action'] = numbers
+    transitions['reward'] = numbers
+    return transitions
+
+
+def push_episodes(ring: TransitionRing, lengths) -> None:
+    """Pushes episodes of the given lengths, numbered consecutively, waiting while the ring is full"""
+    first = 0
+    for length in lengths:
+        while not ring.push(make_transitions(first, length)):
+            pass
+        first += length
+
+
+def read_policy(policy: SharedPolicy, queue) -> None:
+    """Sends the latest snapshot of the policy, as read by another process"""
+    queue.put(policy.read(0))
+
+
+class TestTransitionRing(unittest.TestCase):
+
+    def test_push_and_pop_wrap_around(self):
+        ring = TransitionRing(5)
+        self.assertTrue(ring.push(make_transitions(0, 3)))
+        np.testing.assert_array_equal(ring.pop(), make_transitions(0, 3))
+
+        # Written at positions 3, 4, 0 and 1
+        self.assertTrue(ring.push(make_transitions(3, 4)))
+        np.testing.assert_array_equal(ring.pop(), make_transitions(3, 4))
+
+        for first in range(7, 30, 3):
+            self.assertTrue(ring.push(make_transitions(first, 3)))
+            np.testing.assert_array_equal(ring.pop(), make_transitions(first, 3))
+
+    def test_push_that_does_not_fit(self):
+        ring = TransitionRing(5)
+        self.assertTrue(ring.push(make_transitions(0, 3)))
+        self.assertFalse(ring.push(make_transitions(3, 3)))
+        np.testing.assert_array_equal(ring.pop(), make_transitions(0, 3))
+
+        # Fits once the first transitions are popped, wrapping around the end
+        self.assertTrue(ring.push(make_transitions(3, 3)))
+        self.assertTrue(ring.push(make_transitions(6, 2)))
+        self.assertFalse(ring.push(make_transitions(8, 1)))
+        np.testing.assert_array_equal(ring.pop(), make_transitions(3, 5))
+        self.assertEqual(len(ring.pop()), 0)
+
+    def test_episode_larger_than_capacity(self):
+        with self.assertRaises(AssertionError):
+            TransitionRing(5).push(make_transitions(0, 6))
+
+    def test_push_from_another_process(self):
+        ring = TransitionRing(7)
+        lengths = [3, 5, 7, 2, 6, 4] * 5
+        process = multiprocessing.Process(target=push_episodes, args=(ring, lengths))
+        process.start()
+        popped = []
+        while sum(map(len, popped)) < sum(lengths):
+            popped.append(ring.pop())
+        process.join()
+        np.testing.assert_array_equal(np.concatenate(popped), make_transitions(0, sum(lengths)))
+
+
+class TestSharedPolicy(unittest.TestCase):
+
+    def test_publish_and_read(self):
+        policy = SharedPolicy(4, 3)
+        self.assertIsNone(policy.read(0))
+
+        preferences = np.arange(6, dtype=np.float32).reshape(2, 3)
+        policy.publish([11, 12], preferences, 0.5)
+        sequence, states, read_preferences, epsilon = policy.read(0)
+        self.assertEqual(states, [11, 12])
+        np.testing.assert_array_equal(read_preferences, preferences)
+        self.assertEqual(epsilon, 0.5)
+        self.assertIsNone(policy.read(sequence))
+
+        # States are only appended to, and every row may have changed
+        preferences = np.arange(9, dtype=np.float32).reshape(3, 3) + 10
+        policy.publish([11, 12, 13], preferences, 0.25)
+        next_sequence, states, read_preferences, epsilon = policy.read(sequence)
+        self.assertGreater(next_sequence, sequence)
+        self.assertEqual(states, [11, 12, 13])
+        np.testing.assert_array_equal(read_preferences, preferences)
+        self.assertEqual(epsilon, 0.25)
+
+    def test_publish_beyond_capacity(self):
+        with self.assertRaises(AssertionError):
+            SharedPolicy(2, 3).publish([1, 2, 3], np.zeros((3, 3), dtype=np.float32), 0.5)
+
+    def test_read_after_capacity_restart(self):
+        # Once the states outgrow the policy, the learner publishes to a new one of twice their number
+        states = list(range(100, 104))
+        policy = SharedPolicy(len(states), 2)
+        policy.publish(states, np.ones((len(states), 2), dtype=np.float32), 0.5)
+
+        states = list(range(100, 107))
+        preferences = np.arange(2 * len(states), dtype=np.float32).reshape(len(states), 2)
+        policy = SharedPolicy(2 * len(states), 2)
+        policy.publish(states, preferences, 0.1)
+
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=read_policy, args=(policy, queue))
+        process.start()
+        _, read_states, read_preferences, epsilon = queue.get(timeout=30)
+        process.join()
+        self.assertEqual(read_states, states)
+        np.testing.assert_array_equal(read_preferences, preferences)
+        self.assertAlmostEqual(epsilon, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from board_geometry import BoardGeometry
+from config import Config
+from data_classes import Action
+from symmetry import BoardSymmetries
+from visualize import Visualize
+
+
+class VectorizedWorld:
+    """
+    Simulates several boards of the same shape, size and holes at once
+
+    The boards are stored as one (boards x cells) boolean array where True
+    means the cell holds a peg. Legal moves are computed for every board with
+    array operations over the precomputed jump table, and finished boards are
+    reset automatically. With canonicalize_states, states, state vectors and
+    actions are given in each board's canonical frame, like in SimulatedWorld.
+
+    ...
+
+    Methods
+    -------
+    reset():
+        Resets every board and returns the states and legal actions.
+    step(actions):
+        Performs one action on every board and returns (next states, rewards, final state flags).
+    get_observations():
+        Returns the current states and legal actions, after automatic resets.
+    get_state_vectors():
+        Returns the state vectors of the current boards, after automatic resets.
+    get_next_state_vectors():
+        Returns the state vectors of the boards right after the last step, before automatic resets.
+    get_pegs_remaining():
+        Returns the pegs left on every board right after the last step, before automatic resets.
+    legal_action_masks():
+        Returns a (boards x actions) mask of the legal actions.
+    """
+
+    def __init__(self, config: Config):
+        geometry = BoardGeometry.get(config.board_type, config.size)
+        number_of_boards = config.number_of_boards
+        self.__config = config
+        self.__number_of_boards = number_of_boards
+        self.__actions = geometry.actions
+
+        jumps = np.array([jump[:3] for jump in geometry.jumps], dtype=np.intp).reshape(-1, 3)
+        self.__starts, self.__overs, self.__landings = jumps[:, 0], jumps[:, 1], jumps[:, 2]
+
+        self.__initial_board = np.ones(len(geometry.cells), dtype=bool)
+        for hole in config.holes:
+            if hole in geometry.cell_index:
+                self.__initial_board[geometry.cell_index[hole]] = False
+
+        # One row of zobrist keys and permutations per symmetry; only the identity without canonicalize_states
+        if config.canonicalize_states:
+            symmetries = BoardSymmetries.get(config.board_type, config.size)
+            cell_permutations = np.array(symmetries.cell_permutations, dtype=np.intp)
+            self.__inverse_action_permutations = np.array(symmetries.inverse_action_permutations, dtype=np.intp)
+        else:
+            cell_permutations = np.arange(len(geometry.cells), dtype=np.intp)[np.newaxis]
+            self.__inverse_action_permutations = np.arange(len(self.__actions), dtype=np.intp)[np.newaxis]
+        self.__zobrist_keys = np.array(geometry.zobrist_keys, dtype=np.uint64)[cell_permutations]
+        self.__inverse_cell_permutations = np.argsort(cell_permutations, axis=1)
+
+        self.__boards = np.tile(self.__initial_board, (number_of_boards, 1))
+        self.__next_boards = self.__boards
+        self.__initial_mask = self.legal_action_masks()[0]
+        initial_states, initial_symmetries = self.__get_states(self.__boards[:1])
+        self.__initial_state, self.__initial_symmetry = initial_states[0], initial_symmetries[0]
+
+        self.__masks = self.legal_action_masks()
+        self.__states, self.__symmetries = self.__get_states(self.__boards)
+        self.__next_symmetries = self.__symmetries
+        self.__peg_history: List[int] = []
+        self.__pegs_remaining = self.__boards.sum(axis=1)
+
+    def legal_action_masks(self) -> np.ndarray:
+        """Returns a (boards x actions) mask of the legal actions."""
+        boards = self.__boards
+        return boards[:, self.__starts] & boards[:, self.__overs] & ~boards[:, self.__landings]
+
+    def __get_states(self, boards: np.ndarray) -> Tuple[List[int], np.ndarray]:
+        """
+        Same state keys as SimulatedWorld: the smallest zobrist hash of the images of each board,
+        and the symmetry that gives it (the board's own hash and the identity without CANONICALIZE_STATES)
+        """
+        hashes = np.bitwise_xor.reduce(np.where(boards[:, np.newaxis], self.__zobrist_keys, np.uint64(0)), axis=2)
+        symmetries = hashes.argmin(axis=1)
+        return hashes[np.arange(len(boards)), symmetries].tolist(), symmetries
+
+    def __get_state_vectors(self, boards: np.ndarray, symmetries: np.ndarray) -> List[Tuple[int]]:
+        """Same state vectors as SimulatedWorld: playable cells in row-major order (1 = peg, 2 = empty)"""
+        canonical_boards = np.take_along_axis(boards, self.__inverse_cell_permutations[symmetries], axis=1)
+        return [tuple(row) for row in (2 - canonical_boards).tolist()]
+
+    def get_state_vectors(self) -> List[Tuple[int]]:
+        """Returns the state vectors of the current boards, after automatic resets."""
+        return self.__get_state_vectors(self.__boards, self.__symmetries)
+
+    def get_next_state_vectors(self) -> List[Tuple[int]]:
+        """Returns the state vectors of the boards right after the last step, before automatic resets."""
+        return self.__get_state_vectors(self.__next_boards, self.__next_symmetries)
+
+    def __get_legal_actions(self, masks: np.ndarray) -> List[Tuple[Action]]:
+        canonical_masks = np.take_along_axis(masks, self.__inverse_action_permutations[self.__symmetries], axis=1)
+        return [tuple(self.__actions[action_id] for action_id in np.flatnonzero(mask)) for mask in canonical_masks]
+
+    def reset(self) -> Tuple[List[int], List[Tuple[Action]]]:
+        """Resets every board and returns the states and legal actions."""
+        self.__boards[:] = self.__initial_board
+        self.__next_boards = self.__boards
+        self.__masks = self.legal_action_masks()
+        self.__states, self.__symmetries = self.__get_states(self.__boards)
+        self.__next_symmetries = self.__symmetries
+        return self.get_observations()
+
+    def get_observations(self) -> Tuple[List[int], List[Tuple[Action]]]:
+        """Returns the current states and legal actions, after automatic resets."""
+        return list(self.__states), self.__get_legal_actions(self.__masks)
+
+    def step(self, actions: Sequence[Action]) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """
+        Performs one action on every board and returns (next states, rewards, final state flags).
+        Boards that reach a final state are reset; use get_observations() for the states to act on next.
+        """
+        action_ids = np.fromiter((action.id for action in actions), dtype=np.intp, count=self.__number_of_boards)
+        boards = np.arange(self.__number_of_boards)
+        action_ids = self.__inverse_action_permutations[self.__symmetries, action_ids]
+        assert self.__masks[boards, action_ids].all(), 'Illegal action in batched step.'
+
+        self.__boards[boards, self.__starts[action_ids]] = False
+        self.__boards[boards, self.__overs[action_ids]] = False
+        self.__boards[boards, self.__landings[action_ids]] = True
+
+        masks = self.legal_action_masks()
+        pegs_remaining = self.__boards.sum(axis=1)
+        self.__pegs_remaining = pegs_remaining
+        is_final_state = ~masks.any(axis=1)
+        rewards = np.where(
+            pegs_remaining == 1,
+            self.__config.winning_reward,
+            np.where(is_final_state, self.__config.losing_reward, self.__config.step_reward),
+        )
+        next_states, next_symmetries = self.__get_states(self.__boards)
+
+        self.__states = list(next_states)
+        self.__symmetries = self.__next_symmetries = next_symmetries
+        self.__next_boards = self.__boards
+        if is_final_state.any():
+            self.__next_boards = self.__boards.copy()
+            self.__symmetries = next_symmetries.copy()
+            self.__peg_history.extend(pegs_remaining[is_final_state].tolist())  # Used for plotting
+            self.__boards[is_final_state] = self.__initial_board
+            self.__symmetries[is_final_state] = self.__initial_symmetry
+            masks[is_final_state] = self.__initial_mask
+            for board in np.flatnonzero(is_final_state):
+                self.__states[board] = self.__initial_state
+        self.__masks = masks
+
+        return next_states, rewards, is_final_state
+
+    def get_pegs_remaining(self) -> np.ndarray:
+        """Pegs left on every board right after the last step, before automatic resets"""
+        return self.__pegs_remaining
+
+    def get_peg_history(self) -> List[int]:
+        """Pegs left at the end of every finished episode, in the order the boards finished"""
+        return list(self.__peg_history)
+
+    def plot_training_data(self) -> None:
+        Visualize.plot_training_data(self.__peg_history)
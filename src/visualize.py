@@ -1,14 +1,20 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-
-import parameters
 from data_classes import Shape
 
 
 class Visualize:
+    """
+    Draws the board of one world and plots training data
+
+    Each world has its own instance, holding the board graph and the delay
+    between drawn frames. The training data plots are static methods.
+    matplotlib and networkx are only imported once something is drawn or
+    plotted, so headless runs never load them.
+    """
 
-    __graph = nx.Graph()
-    __frame_delay = parameters.FRAME_DELAY
+    def __init__(self, frame_delay: float):
+        self.__graph = None
+        self.__board_layout = None
+        self.__frame_delay = frame_delay
 
     @staticmethod
     def __add_node_to_graph(graph, position):
@@ -45,8 +51,15 @@ class Visualize:
                     legal_positions.append((i, j))
         return legal_positions
 
-    @classmethod
-    def initialize_board(cls, board, edges, board_type):
+    def initialize_board(self, board, edges, board_type):
+        """Remembers the board layout; the graph is built when the board is first drawn"""
+        self.__board_layout = (board, edges, board_type)
+
+    def __build_graph(self):
+        import networkx as nx
+
+        board, edges, board_type = self.__board_layout
+        self.__graph = nx.Graph()
         size = board.shape[0]
 
         legal_positions = Visualize.__get_legal_positions(board)
@@ -55,23 +68,24 @@ class Visualize:
         if board_type == Shape.Diamond:
             for i in range(size):
                 for j in range(size):
-                    Visualize.__add_node_to_graph(Visualize.__graph, (i, j))
+                    Visualize.__add_node_to_graph(self.__graph, (i, j))
 
         # Create a Hex Triangle grid
         elif board_type == Shape.Triangle:
             for i in range(size):
                 for j in range(i + 1):
-                    Visualize.__add_node_to_graph(Visualize.__graph, (i, j))
+                    Visualize.__add_node_to_graph(self.__graph, (i, j))
 
         for x, y in legal_positions:
             for row_offset, column_offset in edges:
                 neighbor_node = (x + row_offset, y + column_offset)
                 if neighbor_node in legal_positions:
                     Visualize.__add_edge_to_graph(
-                        Visualize.__graph, (x, y), neighbor_node)
+                        self.__graph, (x, y), neighbor_node)
 
-    @staticmethod
-    def draw_board(board_type, board, action_nodes, positions=None):
+    def draw_board(self, board_type, board, action_nodes, positions=None):
+        if self.__graph is None:
+            self.__build_graph()
 
         # List of all node positions currently filled
         filled_nodes = Visualize.__get_filled_nodes(board)
@@ -97,13 +111,15 @@ class Visualize:
                 filled_nodes.remove(nodes)
 
         # Draw first move
-        Visualize.plot_graph(Visualize.__graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors=['green','black','white'])
-        Visualize.plot_graph(Visualize.__graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors=['green','red','white'])
-        Visualize.plot_graph(Visualize.__graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors=['white','red','green'])
-        Visualize.plot_graph(Visualize.__graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors=['white' , 'white','green'])
+        self.plot_graph(self.__graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors=['green','black','white'])
+        self.plot_graph(self.__graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors=['green','red','white'])
+        self.plot_graph(self.__graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors=['white','red','green'])
+        self.plot_graph(self.__graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors=['white' , 'white','green'])
+
+    def plot_graph(self, graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors):
+        import matplotlib.pyplot as plt
+        import networkx as nx
 
-    @staticmethod
-    def plot_graph(graph, positions, empty_nodes, filled_nodes, action_nodes, action_colors):
         nx.draw_networkx_nodes(graph, pos=positions, nodelist=empty_nodes, node_color='white')
         nx.draw_networkx_nodes(graph, pos=positions, nodelist=filled_nodes, node_color='black')
         nx.draw_networkx_nodes(graph, pos=positions, nodelist=[action_nodes[0]], node_color=action_colors[0])
@@ -113,11 +129,13 @@ class Visualize:
 
         plt.axis('off')
         plt.draw()
-        plt.pause(Visualize.__frame_delay)
+        plt.pause(self.__frame_delay)
         plt.clf()
 
     @staticmethod
     def plot_training_data(training_data):
+        import matplotlib.pyplot as plt
+
         plt.title('Training data')
         plt.xlabel('Episode')
         plt.ylabel('Remaining Pegs')
@@ -128,6 +146,8 @@ class Visualize:
 
     @staticmethod
     def plot_epsilon(epsilon_history):
+        import matplotlib.pyplot as plt
+
         plt.title('Epsilon')
         plt.xlabel('Time step')
         plt.ylabel('$\epsilon$')
@@ -145,6 +165,8 @@ class Visualize:
 
     @staticmethod
     def plot_td_error(td_error_history):
+        import matplotlib.pyplot as plt
+
         plt.title('TD error')
         plt.xlabel('Time step')
         plt.ylabel('$\delta$')
@@ -156,6 +178,8 @@ class Visualize:
 
     @staticmethod
     def plot_value_history(value_history):
+        import matplotlib.pyplot as plt
+
         plt.title('Max value')
         plt.xlabel('Episode')
         plt.ylabel('$\max_s V(s)$')